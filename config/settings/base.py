@@ -298,6 +298,118 @@ CACHES = {
 
 REQUESTS_TIMEOUT = 15 
 
+# Monitoramento de temperatura
+# Os jobs são executados pelo processo "manage.py run_monitor_scheduler" (líder
+# eleito por advisory lock). Ative para executá-los também nos processos web.
+TEMPERATURE_SCHEDULER_IN_WEB = env.bool("TEMPERATURE_SCHEDULER_IN_WEB", default=False)
+TEMPERATURE_SCHEDULER_LOCK_ID = 743201  # Chave do advisory lock de liderança
+TEMPERATURE_SCHEDULER_HEARTBEAT_SECONDS = 10
+# "per_monitor": um job do APScheduler por MonitorSetting.
+# "batch": um único job por minuto que busca, em requisições agrupadas, todos os monitores vencidos.
+# "bucket": um job por intervalo distinto (1, 5, 15 min...) que processa todos os monitores desse intervalo.
+# "priority": como "batch", mas recupera ticks atrasados e, sob sobrecarga, processa primeiro os
+# monitores mais próximos do limite, adiando os de baixo risco.
+TEMPERATURE_SCHEDULING_MODE = env("TEMPERATURE_SCHEDULING_MODE", default="per_monitor")
+# Jitter aleatório (segundos) somado a cada execução, além da fase fixa por monitor.
+TEMPERATURE_SCHEDULE_JITTER_SECONDS = env.int("TEMPERATURE_SCHEDULE_JITTER_SECONDS", default=0)
+# Modo "priority": máximo de monitores por tick (0 = ilimitado), margem (°C) abaixo
+# da qual um monitor nunca é adiado e quantos minutos atrasados são recuperados.
+TEMPERATURE_PRIORITY_MAX_PER_TICK = env.int("TEMPERATURE_PRIORITY_MAX_PER_TICK", default=500)
+TEMPERATURE_PRIORITY_AT_RISK_MARGIN_CELSIUS = 2.0
+TEMPERATURE_PRIORITY_MAX_CATCHUP_MINUTES = 60
+# Validade (segundos) da configuração de monitor em cache usada pelos jobs;
+# a entrada é invalidada a cada save/delete do MonitorSetting.
+TEMPERATURE_MONITOR_SNAPSHOT_TTL = 3600
+# Buffer de escrita das leituras do modo "per_monitor": grava em lote ao atingir
+# o tamanho ou após o prazo (segundos) da leitura mais antiga. Tamanho 1 grava na hora.
+TEMPERATURE_READING_BUFFER_SIZE = env.int("TEMPERATURE_READING_BUFFER_SIZE", default=200)
+TEMPERATURE_READING_BUFFER_MAX_WAIT_SECONDS = 2.0
+# Envio dos e-mails de alerta fora do tick: threads do pool e limite de envios
+# pendentes (acima dele o alerta fica sem notificação, registrado em log).
+TEMPERATURE_NOTIFICATION_WORKERS = env.int("TEMPERATURE_NOTIFICATION_WORKERS", default=4)
+TEMPERATURE_NOTIFICATION_MAX_PENDING = 1000
+# Partições mensais da tabela de leituras: meses criados antecipadamente e
+# retenção em dias (0 = manter tudo). Com DETACH_ONLY as partições vencidas são
+# apenas desanexadas (para arquivamento) em vez de removidas.
+TEMPERATURE_READING_PARTITION_MONTHS_AHEAD = 3
+TEMPERATURE_READING_RETENTION_DAYS = env.int("TEMPERATURE_READING_RETENTION_DAYS", default=0)
+TEMPERATURE_READING_RETENTION_DETACH_ONLY = env.bool("TEMPERATURE_READING_RETENTION_DETACH_ONLY", default=False)
+# Resolução usada pela API de leituras para cada time_range: "raw" (leituras
+# brutas) ou os agregados "hour"/"day".
+TEMPERATURE_ROLLUP_RESOLUTIONS = {"24h": "raw", "7d": "hour", "30d": "day"}
+# purge_history: retenção em dias por política (0 = manter tudo), linhas por
+# lote e pausa entre lotes.
+TEMPERATURE_PURGE_RETENTION_DAYS = {
+    "readings": env.int("TEMPERATURE_PURGE_READINGS_DAYS", default=0),
+    "alerts": env.int("TEMPERATURE_PURGE_ALERTS_DAYS", default=0),
+}
+TEMPERATURE_PURGE_CHUNK_SIZE = 5000
+TEMPERATURE_PURGE_SLEEP_SECONDS = 0.1
+# Arquivo colunar de leituras antigas (manage.py archive_readings): diretório dos
+# segmentos e idade, em dias, a partir da qual os meses completos são arquivados.
+# Sem diretório configurado o arquivamento fica desativado; ele deve apontar para
+# um volume persistente montado em todos os containers (veja docker-compose.production.yml).
+TEMPERATURE_ARCHIVE_DIR = env("TEMPERATURE_ARCHIVE_DIR", default=None)
+TEMPERATURE_ARCHIVE_AFTER_DAYS = env.int("TEMPERATURE_ARCHIVE_AFTER_DAYS", default=365)
+# Validade (segundos) dos contadores de alertas não lidos em cache; ao expirar,
+# são recontados no banco.
+TEMPERATURE_UNREAD_COUNTER_TTL = 300
+# Intervalo (minutos) da recontagem completa dos contadores pelo scheduler.
+TEMPERATURE_UNREAD_RECOUNT_MINUTES = 60
+# Paginação por cursor das listagens de leituras e alertas: tamanho padrão e
+# máximo aceito no parâmetro page_size.
+TEMPERATURE_API_PAGE_SIZE = 100
+TEMPERATURE_API_MAX_PAGE_SIZE = env.int("TEMPERATURE_API_MAX_PAGE_SIZE", default=1000)
+# Intervalo adaptativo: folga (°C) até o limite a partir da qual o monitor
+# passa a ser verificado no intervalo máximo (monitoring_interval_minutes).
+TEMPERATURE_ADAPTIVE_FULL_MARGIN_CELSIUS = env.float("TEMPERATURE_ADAPTIVE_FULL_MARGIN_CELSIUS", default=10.0)
+
+# Provedor de clima: OpenMeteoProvider (API real, ou o servidor local
+# "manage.py run_weather_stub" via OPEN_METEO_URL) ou StubWeatherProvider
+# (em processo, sem rede) para testes de carga.
+WEATHER_PROVIDER = env("WEATHER_PROVIDER", default="temptracker.temperature.providers.OpenMeteoProvider")
+WEATHER_STUB_LATENCY_SECONDS = env.float("WEATHER_STUB_LATENCY_SECONDS", default=0.0)
+WEATHER_STUB_ERROR_RATE = env.float("WEATHER_STUB_ERROR_RATE", default=0.0)
+WEATHER_STUB_RANDOM = env.bool("WEATHER_STUB_RANDOM", default=False)
+
+# Open-Meteo
+OPEN_METEO_URL = env("OPEN_METEO_URL", default="https://api.open-meteo.com/v1/forecast")
+OPEN_METEO_BATCH_SIZE = 100  # Localidades por requisição no modo em lote
+
+# Cliente HTTP compartilhado da API de clima (timeout definido por REQUESTS_TIMEOUT)
+WEATHER_HTTP_POOL_SIZE = env.int("WEATHER_HTTP_POOL_SIZE", default=10)  # Conexões keep-alive por processo
+WEATHER_HTTP_RETRIES = env.int("WEATHER_HTTP_RETRIES", default=2)
+WEATHER_HTTP_BACKOFF_FACTOR = 0.5  # Segundos, dobrando a cada nova tentativa
+
+# Motor de busca usado pelo modo em lote: "sync" (requests, em sequência) ou
+# "async" (httpx + asyncio, blocos buscados concorrentemente)
+WEATHER_FETCH_ENGINE = env("WEATHER_FETCH_ENGINE", default="sync")
+WEATHER_ASYNC_CONCURRENCY = env.int("WEATHER_ASYNC_CONCURRENCY", default=50)  # Requisições simultâneas
+
+# Cache de respostas por célula de grade: monitores próximos (mesma célula)
+# reaproveitam a mesma resposta. Em produção o cache "default" é o Redis,
+# compartilhado entre todos os workers. Use 0 para desativar a quantização.
+WEATHER_CACHE_ALIAS = "default"
+WEATHER_GRID_RESOLUTION = env.float("WEATHER_GRID_RESOLUTION", default=0.01)  # Graus (~1 km)
+WEATHER_UPDATE_INTERVAL_SECONDS = 900  # Cadência de atualização dos dados "current" da Open-Meteo
+
+# Modo de busca: "current" consulta a temperatura atual a cada tick; "forecast"
+# busca a série de previsão de 15 em 15 minutos uma vez por atualização do
+# modelo e interpola localmente o valor de cada tick.
+WEATHER_FETCH_MODE = env("WEATHER_FETCH_MODE", default="current")
+WEATHER_FORECAST_DAYS = 2
+WEATHER_FORECAST_REFRESH_SECONDS = 3600  # Validade da série em cache (atualização horária dos modelos)
+
+# Proteção da API de clima: balde de fichas global (compartilhado via Redis
+# quando o cache é django-redis), disjuntor por processo e cache negativo de
+# coordenadas com falha.
+WEATHER_RATE_LIMIT_PER_SECOND = env.float("WEATHER_RATE_LIMIT_PER_SECOND", default=10)
+WEATHER_RATE_LIMIT_BURST = env.int("WEATHER_RATE_LIMIT_BURST", default=20)
+WEATHER_RATE_LIMIT_MAX_WAIT = 5  # Segundos aguardando uma ficha antes de desistir
+WEATHER_CIRCUIT_FAILURE_THRESHOLD = 5  # Falhas consecutivas para abrir o circuito
+WEATHER_CIRCUIT_RESET_SECONDS = 60  # Tempo aberto antes da chamada de teste
+WEATHER_NEGATIVE_CACHE_SECONDS = 600
+
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -30,6 +30,11 @@ CACHES = {
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#email-backend
 
+# SCHEDULER
+# ------------------------------------------------------------------------------
+# Em desenvolvimento o próprio runserver executa os jobs de monitoramento.
+TEMPERATURE_SCHEDULER_IN_WEB = env.bool("TEMPERATURE_SCHEDULER_IN_WEB", default=True)
+
 
 # django-debug-toolbar
 # ------------------------------------------------------------------------------
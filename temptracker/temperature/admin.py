@@ -1,5 +1,8 @@
 from django.contrib import admin
+from django.db import transaction
+from .counters import recount_unread_alerts
 from .models import (TemperatureReading,
+                     TemperatureRollup,
                      Alert,
                      MonitorSetting)
 
@@ -15,12 +18,55 @@ class TemperatureReadingAdmin(admin.ModelAdmin):
     readonly_fields = ('timestamp',)
 
 
+@admin.register(TemperatureRollup)
+class TemperatureRollupAdmin(admin.ModelAdmin):
+    list_display = ('monitor_setting',
+                    'granularity',
+                    'bucket_start',
+                    'min_celsius',
+                    'max_celsius',
+                    'reading_count',
+                    'alert_count')
+    list_filter = ('granularity', 'bucket_start')
+
+
 @admin.register(Alert)
 class AlertAdmin(admin.ModelAdmin):
     list_display = ('alert_temperature_celsius', 'alert_timestamp')
     list_filter = ('alert_timestamp',)
     search_fields = ('alert_temperature_celsius',)
     readonly_fields = ('alert_timestamp',)
+    actions = ['recount_unread']
+
+    # Edições no admin não passam pelos contadores de alertas não lidos:
+    # os dos monitores afetados são recontados após o commit.
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self.recount_after_commit([obj.monitor_setting_id])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self.recount_after_commit([obj.monitor_setting_id])
+
+    def delete_queryset(self, request, queryset):
+        monitor_ids = self.monitor_ids(queryset)
+        super().delete_queryset(request, queryset)
+        self.recount_after_commit(monitor_ids)
+
+    @staticmethod
+    def monitor_ids(queryset):
+        return list(queryset.order_by().values_list('monitor_setting_id', flat=True).distinct())
+
+    @staticmethod
+    def recount_after_commit(monitor_ids):
+        transaction.on_commit(lambda: recount_unread_alerts(monitor_ids))
+
+    @admin.action(description="Recontar alertas não lidos dos monitores selecionados")
+    def recount_unread(self, request, queryset):
+        monitor_ids = self.monitor_ids(queryset)
+        total = recount_unread_alerts(monitor_ids)
+        self.message_user(request, f"Contadores de {len(monitor_ids)} monitores recontados: "
+                                   f"{total} alertas não lidos no total.")
 
 
 @admin.register(MonitorSetting)
@@ -30,9 +76,11 @@ class MonitorSettingAdmin(admin.ModelAdmin):
                     'longitude',
                     'temperature_limit_celsius',
                     'monitoring_interval_minutes',
+                    'adaptive_interval',
+                    'current_interval_minutes',
                     'notification_email',
                     'is_active',
                     'created_at')
-    list_filter = ('is_active', 'monitoring_interval_minutes')
+    list_filter = ('is_active', 'monitoring_interval_minutes', 'adaptive_interval')
     search_fields = ('location_name',)
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('current_interval_minutes', 'created_at', 'updated_at')
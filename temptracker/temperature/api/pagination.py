@@ -0,0 +1,113 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por cursor (keyset) em ``(instante, id)``, do mais recente
+    para o mais antigo.
+
+    O cursor codifica o par da última linha da página, e a página seguinte
+    é buscada com ``(instante, id) < cursor`` sobre um índice na mesma
+    ordem. Assim o custo de cada página não depende da profundidade.
+
+    A view informa os campos em ``keyset_fields`` (ou ``get_keyset_fields()``).
+    Pode também oferecer ``get_archived_items(before, limit)`` para completar
+    a página com itens mais antigos que os do queryset, como o arquivo
+    colunar de leituras. A página tem ``page_size`` itens, limitada por
+    ``TEMPERATURE_API_MAX_PAGE_SIZE``.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = "Cursor inválido."
+
+    def get_page_size(self, request):
+        page_size = settings.TEMPERATURE_API_PAGE_SIZE
+        value = request.query_params.get(self.page_size_query_param)
+        if value:
+            try:
+                page_size = int(value)
+            except ValueError:
+                pass
+        return max(1, min(page_size, settings.TEMPERATURE_API_MAX_PAGE_SIZE))
+
+    def get_keyset_fields(self, view):
+        if hasattr(view, 'get_keyset_fields'):
+            return view.get_keyset_fields()
+        return view.keyset_fields
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            moment, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            moment = parse_datetime(moment)
+            if moment is None:
+                raise ValueError
+            return moment, int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, item):
+        moment, pk = (getattr(item, field) for field in self.fields)
+        data = json.dumps([moment.isoformat(), pk])
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.fields = self.get_keyset_fields(view)
+        time_field, id_field = self.fields
+        before = self.decode_cursor(request)
+
+        if before is not None:
+            queryset = queryset.filter(
+                Q(**{f'{time_field}__lt': before[0]}) | Q(**{time_field: before[0], f'{id_field}__lt': before[1]})
+            )
+        items = list(queryset.order_by(f'-{time_field}', f'-{id_field}')[:self.page_size + 1])
+
+        if len(items) <= self.page_size and hasattr(view, 'get_archived_items'):
+            # Os itens arquivados são todos mais antigos que os do queryset.
+            archive_before = (getattr(items[-1], time_field), getattr(items[-1], id_field)) if items else before
+            items += view.get_archived_items(archive_before, self.page_size + 1 - len(items))
+
+        self.has_next = len(items) > self.page_size
+        self.page = items[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('first', self.get_first_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'first': {'type': 'string', 'format': 'uri'},
+                'results': schema,
+            },
+        }
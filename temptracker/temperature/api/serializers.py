@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from ..models import MonitorSetting, TemperatureReading, Alert
+from ..models import MonitorSetting, TemperatureReading, TemperatureRollup, Alert
 
 
 class MonitorSettingSerializer(serializers.ModelSerializer):
@@ -12,6 +12,34 @@ class MonitorSettingSerializer(serializers.ModelSerializer):
         fields = '__all__' # Inclui todos os campos do modelo
         read_only_fields = ('created_at', 'updated_at') # Campos que não podem ser definidos na criação/atualização
 
+    def validate(self, attrs):
+        # Mesma regra de MonitorSetting.clean(), que o DRF não executa.
+        minimum = attrs.get('min_monitoring_interval_minutes',
+                            getattr(self.instance, 'min_monitoring_interval_minutes', None))
+        maximum = attrs.get('monitoring_interval_minutes', getattr(self.instance, 'monitoring_interval_minutes', None))
+        if minimum is not None and maximum is not None and minimum > maximum:
+            raise serializers.ValidationError({
+                'min_monitoring_interval_minutes': "O intervalo mínimo não pode ser maior que o intervalo de monitoramento."
+            })
+        return attrs
+
+
+class MonitorStateSerializer(serializers.ModelSerializer):
+    """
+    Serializador do estado atual de cada localidade (painel).
+    Combina os dados do MonitorSetting com o MonitorState mantido na
+    gravação das leituras; os campos de estado são nulos até a primeira leitura.
+    """
+    last_temperature_celsius = serializers.FloatField(source='state.last_temperature_celsius', read_only=True)
+    last_reading_at = serializers.DateTimeField(source='state.last_reading_at', read_only=True)
+    last_alert_at = serializers.DateTimeField(source='state.last_alert_at', read_only=True)
+    unread_alert_count = serializers.IntegerField(source='state.unread_alert_count', read_only=True)
+
+    class Meta:
+        model = MonitorSetting
+        fields = ['id', 'location_name', 'latitude', 'longitude', 'temperature_limit_celsius', 'is_active',
+                  'last_temperature_celsius', 'last_reading_at', 'last_alert_at', 'unread_alert_count']
+
 
 class TemperatureReadingSerializer(serializers.ModelSerializer):
     """
@@ -29,6 +57,24 @@ class TemperatureReadingSerializer(serializers.ModelSerializer):
         read_only_fields = ('timestamp',) # timestamp é definido automaticamente
 
 
+class TemperatureRollupSerializer(serializers.ModelSerializer):
+    """
+    Serializador para o modelo TemperatureRollup.
+    Usado pela listagem de leituras em períodos longos: cada item representa
+    uma hora ou um dia, com a média em 'temperature_celsius' e o início do
+    período em 'timestamp', mantendo os nomes dos campos das leituras brutas.
+    """
+    location_name = serializers.CharField(source='monitor_setting.location_name', read_only=True)
+    temperature_celsius = serializers.FloatField(source='avg_celsius', read_only=True)
+    timestamp = serializers.DateTimeField(source='bucket_start', read_only=True)
+
+    class Meta:
+        model = TemperatureRollup
+        fields = ['id', 'location_name', 'temperature_celsius', 'timestamp', 'granularity',
+                  'min_celsius', 'max_celsius', 'reading_count', 'alert_count']
+        read_only_fields = fields
+
+
 class AlertSerializer(serializers.ModelSerializer):
     """
     Serializador para o modelo Alert.
@@ -1,12 +1,25 @@
 from rest_framework import generics
 from ..models import (TemperatureReading,
+                      TemperatureRollup,
+                      MonitorState,
                       Alert,
                       MonitorSetting)
+from ..archive import get_watermark, read_latest_history
+from ..counters import alert_confirmed, unread_alert_count
+from ..monitoring import get_scheduler_stats
+from ..rollups import bucket_start
+from .pagination import KeysetPagination
 from .serializers import (MonitorSettingSerializer,
+                          MonitorStateSerializer,
                           TemperatureReadingSerializer,
+                          TemperatureRollupSerializer,
                           AlertSerializer)
 from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.shortcuts import get_object_or_404
 from rest_framework.response import Response
 from rest_framework import status
@@ -24,6 +37,17 @@ class MonitorSettingListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = MonitorSettingSerializer
 
 
+class MonitorStateListAPIView(generics.ListAPIView):
+    """
+    API View com a temperatura atual de cada localidade.
+    - GET: Lista os monitores com a última leitura, o último alerta e a
+      quantidade de alertas não lidos, lidos de MonitorState em uma única
+      consulta (sem percorrer a tabela de leituras).
+    """
+    queryset = MonitorSetting.objects.select_related('state').order_by('location_name')
+    serializer_class = MonitorStateSerializer
+
+
 class TemperatureReadingListAPIView(generics.ListAPIView):
     """
     API View para listar leituras de temperatura com filtro de período e ID da localidade.
@@ -33,13 +57,36 @@ class TemperatureReadingListAPIView(generics.ListAPIView):
         - '24h': Últimas 24 horas.
         - '7d': Últimos 7 dias.
         - '30d': Últimos 30 dias.
+      - Pode receber 'start' e 'end' (ISO 8601) para um período arbitrário,
+        inclusive anterior à marca d'água do arquivo colunar.
       - Pode receber um parâmetro 'location_id' na URL para filtrar por ID da localidade (ex: 1, 2).
+      - Períodos longos são servidos a partir dos agregados por hora/dia
+        (TEMPERATURE_ROLLUP_RESOLUTIONS); o parâmetro 'resolution' ('raw',
+        'hour' ou 'day') escolhe a resolução explicitamente.
+      - Paginada por cursor em (timestamp, id): siga o link 'next' da
+        resposta; 'page_size' define o tamanho da página.
     """
     serializer_class = TemperatureReadingSerializer
+    pagination_class = KeysetPagination
+    resolutions = ('raw', TemperatureRollup.HOUR, TemperatureRollup.DAY)
 
-    def get_queryset(self):
+    def get_resolution(self):
+        time_range = self.request.query_params.get('time_range', '24h')
+        resolution = self.request.query_params.get(
+            'resolution', settings.TEMPERATURE_ROLLUP_RESOLUTIONS.get(time_range, 'raw'))
+        if resolution not in self.resolutions:
+            raise ValidationError({"resolution": f"Use um dos valores: {', '.join(self.resolutions)}."})
+        return resolution
+
+    def get_serializer_class(self):
+        if self.get_resolution() != 'raw':
+            return TemperatureRollupSerializer
+        return TemperatureReadingSerializer
+
+    def get_period(self):
         """
-        Retorna leituras de temperatura filtradas por período e/ou ID da localidade.
+        Retorna ``(início, fim)`` do período pedido: 'start'/'end' (ISO 8601)
+        quando informados, senão o 'time_range' até agora.
         """
         time_range = self.request.query_params.get('time_range', '24h')
 
@@ -55,28 +102,116 @@ class TemperatureReadingListAPIView(generics.ListAPIView):
         else:
             start_time = end_time - timedelta(hours=24)
 
-        queryset = TemperatureReading.objects.filter(timestamp__gte=start_time)
-
+        for name in ('start', 'end'):
+            value = self.request.query_params.get(name)
+            if not value:
+                continue
+            moment = parse_datetime(value)
+            if moment is None:
+                raise ValidationError({name: "Informe uma data/hora válida no formato ISO 8601."})
+            if timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+            if name == 'start':
+                start_time = moment
+            else:
+                end_time = moment
+        return start_time, end_time
+
+    def get_location_id(self):
         location_id_param = self.request.query_params.get('location_id')
 
         if location_id_param:
             try:
-                location_id = int(location_id_param)
-                queryset = queryset.filter(monitor_setting__id=location_id)
+                return int(location_id_param)
             except ValueError:
                 raise ValidationError({"location_id": "O ID da localidade deve ser um número inteiro válido."})
+        return None
 
-        queryset = queryset.order_by('-timestamp')
+    def get_queryset(self):
+        """
+        Retorna leituras de temperatura (ou seus agregados) filtradas por período e/ou ID da localidade.
+        Leituras brutas anteriores à marca d'água do arquivo colunar são lidas do arquivo e
+        acrescentadas após as do banco.
+        """
+        start_time, end_time = self.get_period()
+        location_id = self.get_location_id()
+
+        resolution = self.get_resolution()
+        if resolution == 'raw':
+            queryset = TemperatureReading.objects.filter(timestamp__gte=start_time, timestamp__lt=end_time)
+        else:
+            queryset = TemperatureRollup.objects.filter(
+                granularity=resolution,
+                bucket_start__gte=bucket_start(start_time, resolution),
+                bucket_start__lt=end_time
+            ).select_related('monitor_setting')
+
+        if location_id is not None:
+            queryset = queryset.filter(monitor_setting__id=location_id)
+
+        # Período anterior à marca d'água, servido do arquivo colunar após as leituras do banco
+        watermark = get_watermark()
+        self.archive_range = None
+        if resolution == 'raw' and watermark and start_time < watermark:
+            self.archive_range = (start_time, min(end_time, watermark), location_id)
+
+        time_field = self.get_keyset_fields()[0]
+        queryset = queryset.select_related('monitor_setting').order_by(f'-{time_field}', '-id')
         return queryset
 
+    def get_keyset_fields(self):
+        return ('timestamp', 'id') if self.get_resolution() == 'raw' else ('bucket_start', 'id')
+
+    def get_archived_items(self, before, limit):
+        """
+        Até ``limit`` leituras do arquivo colunar anteriores ao cursor
+        ``before``, como instâncias (não salvas) de TemperatureReading.
+        """
+        if not self.archive_range:
+            return []
+        start_time, end_time, location_id = self.archive_range
+        rows = read_latest_history(start_time, end_time, [location_id] if location_id is not None else None,
+                                   before=before, limit=limit)
+        monitors = MonitorSetting.objects.in_bulk({row[0] for row in rows})
+        return [
+            TemperatureReading(id=reading_id, monitor_setting=monitors[monitor_id], temperature_celsius=temperature,
+                               latitude=monitors[monitor_id].latitude, longitude=monitors[monitor_id].longitude,
+                               timestamp=moment, generated_notification=flag)
+            for monitor_id, reading_id, moment, temperature, flag in rows
+            if monitor_id in monitors
+        ]
+
 
 class AlertListCreateAPIView(generics.ListAPIView):
     """
     API View para listar os alertas.
-    - GET: Lista todos os alertas existentes.
+    - GET: Lista os alertas não lidos, paginados por cursor em
+      (alert_timestamp, id) (link 'next' e parâmetro 'page_size').
     """
-    queryset = Alert.objects.filter(read_confirmation=False).order_by('-alert_timestamp')
+    # Servida pelo índice parcial de alertas não lidos (alert_unread_ts_id_idx)
+    queryset = Alert.objects.filter(read_confirmation=False).select_related('monitor_setting') \
+        .order_by('-alert_timestamp')
     serializer_class = AlertSerializer
+    pagination_class = KeysetPagination
+    keyset_fields = ('alert_timestamp', 'id')
+
+
+class UnreadAlertCountView(APIView):
+    """
+    API View com a quantidade de alertas não lidos, para badges do frontend.
+    - GET: Retorna o total; com 'location_id', apenas o da localidade.
+      Lido dos contadores em cache, sem consultar a tabela de alertas.
+    """
+    def get(self, request, format=None):
+        location_id_param = request.query_params.get('location_id')
+        if location_id_param:
+            try:
+                location_id = int(location_id_param)
+            except ValueError:
+                raise ValidationError({"location_id": "O ID da localidade deve ser um número inteiro válido."})
+            return Response({"location_id": location_id, "unread": unread_alert_count(location_id)},
+                            status=status.HTTP_200_OK)
+        return Response({"unread": unread_alert_count()}, status=status.HTTP_200_OK)
 
 
 class AlertConfirmView(APIView):
@@ -88,13 +223,31 @@ class AlertConfirmView(APIView):
         alert = get_object_or_404(Alert, pk=pk)
 
         if alert.read_confirmation:
-            serializer = AlertSerializer(alert) 
+            serializer = AlertSerializer(alert)
             return Response(
                 {"detail": "Alerta já confirmado.", "alert": serializer.data},
                 status=status.HTTP_200_OK
             )
+        # UPDATE condicional: confirmações simultâneas descontam os contadores uma única vez.
+        with transaction.atomic():
+            confirmed = Alert.objects.filter(pk=alert.pk, read_confirmation=False).update(read_confirmation=True)
+            if confirmed:
+                MonitorState.objects.filter(monitor_setting_id=alert.monitor_setting_id, unread_alert_count__gt=0) \
+                    .update(unread_alert_count=F('unread_alert_count') - 1)
+                # Os contadores em cache só são descontados se a confirmação for gravada.
+                transaction.on_commit(lambda: alert_confirmed(alert))
         alert.read_confirmation = True
-        alert.save(update_fields=['read_confirmation'])
 
         serializer = AlertSerializer(alert)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class SchedulerStatsView(APIView):
+    """
+    API View com as estatísticas do último tick do modo "priority".
+    - GET: Retorna monitores pendentes, processados, adiados (no tick e no
+      total acumulado), os adiados do tick anterior retomados e o atraso em
+      minutos.
+    """
+    def get(self, request, format=None):
+        return Response(get_scheduler_stats(), status=status.HTTP_200_OK)
@@ -11,61 +11,26 @@ class TemperatureConfig(AppConfig):
     def ready(self):
         """
         Método chamado quando a aplicação Django está pronta.
-        Aqui inicializamos o scheduler.
+        Aqui registramos os sinais e inicializamos o scheduler.
+
+        Os jobs só são executados pelo processo ``run_monitor_scheduler``
+        (ou aqui, nos processos web, se ``TEMPERATURE_SCHEDULER_IN_WEB``
+        estiver ativo); nos demais processos, inclusive outros comandos de
+        gerenciamento, o scheduler fica pausado e serve apenas para gravar
+        alterações de jobs no DjangoJobStore.
         """
+        # Limpeza de jobs e do cache de configuração ao salvar/excluir monitores.
+        from . import signals  # noqa: F401
+
         try:
             # Importar aqui para evitar problemas de importação circular se scheduler for usado aqui
-            from .models import scheduler 
+            from .scheduling import ensure_scheduler_started, reconcile_jobs, runs_jobs_in_process
 
-            # Verificar se o scheduler já está rodando
-            if not scheduler.running:
-                scheduler.start()
-                logger.info("Scheduler iniciado no AppConfig")
+            ensure_scheduler_started()
 
-            # Recriar jobs existentes após reinicialização do servidor
-            self._recreate_existing_jobs()
+            # Sincronizar os jobs com os monitores após reinicialização do servidor
+            if runs_jobs_in_process():
+                reconcile_jobs()
 
         except Exception as e:
             logger.error(f"Erro ao inicializar scheduler no AppConfig: {str(e)}")
-
-    def _recreate_existing_jobs(self):
-        """
-        Recria os jobs para MonitorSettings ativos após reinicialização do servidor
-        """
-        try:
-            # Mova estas importações para dentro da função
-            from .models import MonitorSetting, scheduler 
-            from apscheduler.triggers.interval import IntervalTrigger 
-
-            # Buscar todas as configurações ativas
-            active_monitors = MonitorSetting.objects.filter(is_active=True)
-
-            for monitor in active_monitors:
-                job_id = f"monitor_temp_{monitor.pk}"
-
-                # Verificar se o job já existe
-                try:
-                    existing_job = scheduler.get_job(job_id)
-                    if existing_job:
-                        logger.info(f"Job {job_id} já existe, pulando...")
-                        continue
-                except:
-                    pass  # Job não existe, vamos criar
-
-                # Criar o job
-                try:
-                    scheduler.add_job(
-                        func=monitor._monitor_temperature,
-                        trigger=IntervalTrigger(minutes=monitor.monitoring_interval_minutes),
-                        id=job_id,
-                        name=f"Monitor {monitor.location_name}",
-                        replace_existing=True,
-                        max_instances=1
-                    )
-                    logger.info(f"Job recriado: {job_id} para {monitor.location_name}")
-
-                except Exception as e:
-                    logger.error(f"Erro ao recriar job {job_id}: {str(e)}")
-
-        except Exception as e:
-            logger.error(f"Erro ao recriar jobs existentes: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,377 @@
+import bisect
+import itertools
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+
+from .models import TemperatureReading
+from .partitions import month_start, next_month
+
+logger = logging.getLogger(__name__)
+
+# Segmento: cabeçalho de 16 bytes (assinatura + quantidade de leituras), que
+# mantém as colunas alinhadas, seguido das
+# colunas em blocos contíguos, little-endian e ordenadas pelo instante:
+# id (int64), instante em microssegundos Unix (int64), temperatura
+# (float32) e alerta gerado (uint8).
+SEGMENT_MAGIC = b"TRD1"
+SEGMENT_HEADER = struct.Struct("<4s4xQ")
+SEGMENT_SUFFIX = ".trd"
+WATERMARK_FILE = "watermark"
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_micros(moment):
+    return (moment - EPOCH) // MICROSECOND
+
+
+def _from_micros(micros):
+    return EPOCH + micros * MICROSECOND
+
+
+class ArchiveError(Exception):
+    """Um segmento gravado não pôde ser confirmado; nenhuma leitura é removida do banco."""
+
+
+def archive_dir():
+    """Diretório do arquivo colunar, ou ``None`` se ``TEMPERATURE_ARCHIVE_DIR`` não estiver configurado."""
+    return settings.TEMPERATURE_ARCHIVE_DIR or None
+
+
+def _fsync_directory(directory):
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def segment_path(monitor_id, month, directory=None):
+    return os.path.join(directory or archive_dir(), str(monitor_id), f"{month:%Y-%m}{SEGMENT_SUFFIX}")
+
+
+def write_segment(path, rows):
+    """
+    Grava um segmento com ``rows`` no formato ``(id, instante, temperatura,
+    alerta)``, já ordenadas pelo instante. A gravação é atômica (arquivo
+    temporário + rename) e durável: o arquivo e o diretório passam por fsync
+    antes do retorno.
+    """
+    ids, moments, temperatures, flags = array("q"), array("q"), array("f"), array("B")
+    for reading_id, moment, temperature, flag in rows:
+        ids.append(reading_id)
+        moments.append(_to_micros(moment))
+        temperatures.append(temperature)
+        flags.append(int(flag))
+    if sys.byteorder != "little":
+        for column in (ids, moments, temperatures):
+            column.byteswap()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as segment:
+        segment.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, len(ids)))
+        for column in (ids, moments, temperatures, flags):
+            column.tofile(segment)
+        segment.flush()
+        os.fsync(segment.fileno())
+    os.replace(temporary, path)
+    _fsync_directory(os.path.dirname(path))
+
+
+def verify_segment(path, rows):
+    """
+    Relê o segmento gravado e confirma que contém exatamente ``rows`` (ids e
+    instantes, na mesma ordem). Levanta ArchiveError em caso de divergência.
+    """
+    try:
+        with ArchiveSegment(path) as segment:
+            matches = segment.count == len(rows) and all(
+                segment.ids[index] == row[0] and segment.moments[index] == _to_micros(row[1])
+                for index, row in enumerate(rows)
+            )
+    except (OSError, ValueError) as e:
+        raise ArchiveError(f"Segmento ilegível após a gravação: {path} ({e})")
+    if not matches:
+        raise ArchiveError(f"Segmento divergente após a gravação: {path}")
+
+
+class ArchiveSegment:
+    """
+    Leitura de um segmento mapeado em memória: as colunas são expostas como
+    ``memoryview`` sobre o mmap, sem copiar os dados, e o intervalo pedido é
+    localizado por busca binária na coluna de instantes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as segment:
+            self._map = mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = SEGMENT_HEADER.unpack_from(self._map)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"Segmento de arquivo inválido: {path}")
+        self.count = count
+        self._view = view = memoryview(self._map)
+        offset = SEGMENT_HEADER.size
+        self.ids = view[offset:offset + 8 * count].cast("q")
+        offset += 8 * count
+        self.moments = view[offset:offset + 8 * count].cast("q")
+        offset += 8 * count
+        self.temperatures = view[offset:offset + 4 * count].cast("f")
+        offset += 4 * count
+        self.flags = view[offset:offset + count]
+
+    def close(self):
+        for column in (self.ids, self.moments, self.temperatures, self.flags, self._view):
+            column.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _bounds(self, start, end):
+        low = bisect.bisect_left(self.moments, _to_micros(start)) if start else 0
+        high = bisect.bisect_left(self.moments, _to_micros(end)) if end else self.count
+        return low, high
+
+    def rows(self, start=None, end=None):
+        """Leituras com instante em ``[start, end)`` como ``(id, instante, temperatura, alerta)``."""
+        low, high = self._bounds(start, end)
+        for index in range(low, high):
+            yield (self.ids[index], _from_micros(self.moments[index]),
+                   round(self.temperatures[index], 2), bool(self.flags[index]))
+
+    def latest_rows(self, start, end, before=None, limit=None):
+        """
+        Leituras em ``[start, end)`` da mais recente para a mais antiga, até
+        ``limit``. Com ``before = (instante, id)``, apenas as anteriores a
+        esse par (cursor de paginação).
+        """
+        low, high = self._bounds(start, end)
+        if before is not None:
+            cursor = (_to_micros(before[0]), before[1])
+            high = min(high, bisect.bisect_right(self.moments, cursor[0], low, high))
+        rows = []
+        for index in range(high - 1, low - 1, -1):
+            if limit is not None and len(rows) >= limit:
+                break
+            if before is not None and (self.moments[index], self.ids[index]) >= cursor:
+                continue
+            rows.append((self.ids[index], _from_micros(self.moments[index]),
+                         round(self.temperatures[index], 2), bool(self.flags[index])))
+        return rows
+
+    def aggregate(self, start=None, end=None):
+        """Mínimo, máximo, soma, quantidade e alertas das leituras em ``[start, end)``."""
+        low, high = self._bounds(start, end)
+        if low >= high:
+            return None
+        temperatures = self.temperatures[low:high]
+        return {
+            'min': min(temperatures),
+            'max': max(temperatures),
+            'sum': sum(temperatures),
+            'count': high - low,
+            'alerts': sum(self.flags[low:high]),
+        }
+
+
+def get_watermark(directory=None):
+    """Instante até o qual (exclusive) as leituras estão apenas no arquivo, ou ``None``."""
+    directory = directory or archive_dir()
+    if directory is None:
+        return None
+    path = os.path.join(directory, WATERMARK_FILE)
+    try:
+        with open(path) as watermark:
+            return datetime.fromisoformat(watermark.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+def _set_watermark(moment, directory=None):
+    directory = directory or archive_dir()
+    os.makedirs(directory, exist_ok=True)
+    temporary = os.path.join(directory, f"{WATERMARK_FILE}.tmp")
+    with open(temporary, "w") as watermark:
+        watermark.write(moment.isoformat())
+        watermark.flush()
+        os.fsync(watermark.fileno())
+    os.replace(temporary, os.path.join(directory, WATERMARK_FILE))
+    _fsync_directory(directory)
+
+
+def _segments(start, end, monitor_ids=None, directory=None):
+    """Segmentos existentes dos meses que intersectam ``[start, end)``."""
+    directory = directory or archive_dir()
+    if directory is None:
+        return
+    if monitor_ids is None:
+        monitor_ids = [int(name) for name in os.listdir(directory) if name.isdigit()] \
+            if os.path.isdir(directory) else []
+    month = month_start(start)
+    while month < end:
+        for monitor_id in monitor_ids:
+            path = segment_path(monitor_id, month, directory)
+            if os.path.exists(path):
+                yield monitor_id, path
+        month = next_month(month)
+
+
+def read_history(start, end, monitor_ids=None, directory=None):
+    """
+    Leituras arquivadas em ``[start, end)`` como ``(monitor_id, id, instante,
+    temperatura, alerta)``, opcionalmente restritas a ``monitor_ids``.
+    """
+    for monitor_id, path in _segments(start, end, monitor_ids, directory):
+        with ArchiveSegment(path) as segment:
+            for row in segment.rows(start, end):
+                yield (monitor_id, *row)
+
+
+def read_latest_history(start, end, monitor_ids=None, before=None, limit=100, directory=None):
+    """
+    Até ``limit`` leituras arquivadas em ``[start, end)``, da mais recente
+    para a mais antiga por ``(instante, id)``, opcionalmente anteriores ao
+    cursor ``before = (instante, id)``. Os meses são lidos do mais recente
+    para o mais antigo e a leitura para assim que o limite é atingido, de
+    modo que o custo depende do tamanho da página, não da profundidade.
+    """
+    if before is not None:
+        end = min(end, before[0] + MICROSECOND)
+    result = []
+    month = month_start(end - MICROSECOND)
+    while month >= month_start(start) and len(result) < limit:
+        month_end = next_month(month)
+        rows = []
+        for monitor_id, path in _segments(month, month_end, monitor_ids, directory):
+            with ArchiveSegment(path) as segment:
+                rows.extend((monitor_id, *row) for row in
+                            segment.latest_rows(max(start, month), min(end, month_end), before, limit - len(result)))
+        rows.sort(key=lambda row: (row[2], row[1]), reverse=True)
+        result.extend(rows[:limit - len(result)])
+        month = month_start(month - timedelta(days=1))
+    return result
+
+
+def aggregate_history(start, end, monitor_ids=None, directory=None):
+    """Agregados das leituras arquivadas em ``[start, end)``, por monitor."""
+    result = {}
+    for monitor_id, path in _segments(start, end, monitor_ids, directory):
+        with ArchiveSegment(path) as segment:
+            stats = segment.aggregate(start, end)
+        if stats is None:
+            continue
+        current = result.get(monitor_id)
+        if current is None:
+            result[monitor_id] = stats
+        else:
+            current['min'] = min(current['min'], stats['min'])
+            current['max'] = max(current['max'], stats['max'])
+            for key in ('sum', 'count', 'alerts'):
+                current[key] += stats[key]
+    return result
+
+
+def _delete_archived(month, end, ids, chunk_size):
+    """
+    Remove do banco exatamente as leituras ``ids`` do mês, em lotes com
+    transação própria. Leituras gravadas no mês depois da leitura do
+    segmento não estão em ``ids`` e permanecem no banco.
+    """
+    deleted = 0
+    for offset in range(0, len(ids), chunk_size):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {TemperatureReading._meta.db_table} '
+                f'WHERE "timestamp" >= %s AND "timestamp" < %s AND id = ANY(%s)',
+                [month, end, ids[offset:offset + chunk_size]],
+            )
+            deleted += cursor.rowcount
+    return deleted
+
+
+def archive_month(month, directory=None, chunk_size=None):
+    """
+    Grava os segmentos de todos os monitores com leituras no mês que começa
+    em ``month`` e remove do banco as leituras gravadas em cada segmento,
+    assim que ele é confirmado em disco. Retorna ``(segmentos, removidas)``.
+    """
+    end = next_month(month)
+    chunk_size = chunk_size or settings.TEMPERATURE_PURGE_CHUNK_SIZE
+    readings = (
+        TemperatureReading.objects.filter(timestamp__gte=month, timestamp__lt=end)
+        .order_by('monitor_setting_id', 'timestamp')
+        .values_list('monitor_setting_id', 'id', 'timestamp', 'temperature_celsius', 'generated_notification')
+        .iterator(chunk_size=10000)
+    )
+    segments = deleted = 0
+    for monitor_id, group in itertools.groupby(readings, key=lambda row: row[0]):
+        path = segment_path(monitor_id, month, directory)
+        fresh = [row[1:] for row in group]
+        rows = fresh
+        if os.path.exists(path):
+            # Mês já arquivado em parte: mescla com o segmento existente.
+            with ArchiveSegment(path) as segment:
+                known = {row[0] for row in fresh}
+                rows = fresh + [row for row in segment.rows() if row[0] not in known]
+            rows.sort(key=lambda row: (row[1], row[0]))
+        write_segment(path, rows)
+        verify_segment(path, rows)
+        segments += 1
+        deleted += _delete_archived(month, end, [row[0] for row in fresh], chunk_size)
+    return segments, deleted
+
+
+def archive_readings(before=None, chunk_size=None, directory=None):
+    """
+    Move para o arquivo colunar os meses completos de leituras anteriores a
+    ``before`` (por padrão, ``TEMPERATURE_ARCHIVE_AFTER_DAYS`` dias atrás).
+    Cada segmento é gravado, sincronizado em disco e relido antes de suas
+    leituras serem removidas do banco (apenas as gravadas nele), e a marca
+    d'água avança mês a mês. Exige ``TEMPERATURE_ARCHIVE_DIR``
+    configurado explicitamente (em produção, um volume persistente
+    compartilhado pelos containers). Retorna a lista dos meses arquivados.
+    """
+    directory = directory or archive_dir()
+    if directory is None:
+        raise ImproperlyConfigured(
+            "TEMPERATURE_ARCHIVE_DIR não está configurado; as leituras não serão removidas do banco."
+        )
+    before = before or datetime.now(dt_timezone.utc) - timedelta(days=settings.TEMPERATURE_ARCHIVE_AFTER_DAYS)
+    limit = month_start(before)
+    chunk_size = chunk_size or settings.TEMPERATURE_PURGE_CHUNK_SIZE
+
+    oldest = TemperatureReading.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+    month = month_start(get_watermark(directory) or oldest or limit)
+    if oldest is not None:
+        month = min(month, month_start(oldest))
+
+    archived = []
+    while month < limit:
+        end = next_month(month)
+        segments, deleted = archive_month(month, directory, chunk_size)
+        if TemperatureReading.objects.filter(timestamp__gte=month, timestamp__lt=end).exists():
+            # Leituras gravadas no mês durante o arquivamento: uma segunda passagem
+            # as mescla aos segmentos. As que chegarem depois dela ficam no banco
+            # e são arquivadas na próxima execução.
+            more_segments, more_deleted = archive_month(month, directory, chunk_size)
+            segments += more_segments
+            deleted += more_deleted
+        _set_watermark(end, directory)
+        logger.info(f"Mês {month:%Y-%m} arquivado: {segments} segmentos, {deleted} leituras removidas do banco")
+        archived.append(month)
+        month = end
+    return archived
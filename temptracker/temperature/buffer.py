@@ -0,0 +1,126 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+class ReadingBuffer:
+    """
+    Acumula leituras ``(monitor, temperatura)`` vindas de vários jobs
+    concorrentes e as grava em micro-lotes (``monitoring.record_temperatures``),
+    quando o buffer atinge ``max_size`` leituras ou após ``max_wait``
+    segundos da primeira leitura pendente, o que ocorrer antes.
+
+    A gravação é feita por uma thread própria, de modo que os jobs não
+    esperam pelo banco. Leituras pendentes são gravadas ao encerrar o processo.
+    """
+
+    def __init__(self, max_size=None, max_wait=None):
+        self.max_size = max_size if max_size is not None else settings.TEMPERATURE_READING_BUFFER_SIZE
+        self.max_wait = max_wait if max_wait is not None else settings.TEMPERATURE_READING_BUFFER_MAX_WAIT_SECONDS
+        self._items = []
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._worker = None
+
+    def add(self, monitor, temperature):
+        if self.max_size <= 1:
+            self._write([(monitor, temperature)])
+            return
+        with self._condition:
+            self._items.append((monitor, temperature))
+            if len(self._items) >= self.max_size:
+                self._condition.notify()
+            elif len(self._items) == 1:
+                # Primeira leitura pendente: acorda a thread para contar o prazo.
+                self._condition.notify()
+            self._ensure_worker()
+
+    def flush(self):
+        """Grava imediatamente as leituras pendentes."""
+        with self._condition:
+            items, self._items = self._items, []
+        self._write(items)
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="reading-buffer", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._items)
+                self._condition.wait_for(lambda: len(self._items) >= self.max_size, timeout=self.max_wait)
+                items, self._items = self._items, []
+            self._write(items)
+
+    def _write(self, items):
+        if not items:
+            return
+        from .monitoring import record_temperatures
+
+        with self._write_lock:
+            # Descarta conexões quebradas ou vencidas, como o Django faz a cada requisição.
+            close_old_connections()
+            try:
+                record_temperatures(items)
+            except IntegrityError as e:
+                logger.warning(f"Lote de {len(items)} leituras rejeitado pelo banco, regravando por monitor: {e}")
+                self._write_existing(items)
+            except Exception as e:
+                logger.error(f"Erro ao gravar {len(items)} leituras do buffer: {e}")
+
+    def _write_existing(self, items):
+        """
+        Regrava um lote rejeitado por violação de integridade, normalmente um
+        monitor excluído enquanto suas leituras estavam no buffer: as leituras
+        de monitores que não existem mais são descartadas e as demais
+        gravadas de novo; se o lote ainda falhar, grava monitor a monitor,
+        para que um único monitor problemático não derrube os outros.
+        """
+        from .models import MonitorSetting
+        from .monitoring import record_temperatures
+
+        existing = set(MonitorSetting.objects.filter(pk__in={monitor.pk for monitor, _ in items})
+                       .values_list('pk', flat=True))
+        kept = [(monitor, temperature) for monitor, temperature in items if monitor.pk in existing]
+        if len(kept) < len(items):
+            logger.warning(f"{len(items) - len(kept)} leituras descartadas: monitor excluído")
+        if not kept:
+            return
+        try:
+            record_temperatures(kept)
+            return
+        except Exception as e:
+            logger.warning(f"Lote de {len(kept)} leituras rejeitado novamente, gravando por monitor: {e}")
+
+        by_monitor = {}
+        for monitor, temperature in kept:
+            by_monitor.setdefault(monitor.pk, []).append((monitor, temperature))
+        for pk, monitor_items in by_monitor.items():
+            try:
+                record_temperatures(monitor_items)
+            except Exception as e:
+                logger.error(f"Erro ao gravar {len(monitor_items)} leituras do monitor {pk}: {e}")
+
+
+def get_reading_buffer():
+    """
+    Retorna o buffer de leituras compartilhado pelo processo, criando-o na
+    primeira chamada.
+    """
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ReadingBuffer()
+                atexit.register(_buffer.flush)
+    return _buffer
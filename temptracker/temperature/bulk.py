@@ -0,0 +1,40 @@
+import json
+import os
+
+from .models import TemperatureReading
+
+READING_TABLE = TemperatureReading._meta.db_table
+# Colunas trocadas por export_readings/import_readings, nesta ordem
+READING_COPY_COLUMNS = ['id', 'monitor_setting_id', 'temperature_celsius', 'latitude', 'longitude',
+                        'timestamp', 'generated_notification']
+FORMAT_EXTENSIONS = {'csv': '.csv', 'binary': '.bin'}
+PROGRESS_FILE = "progress.json"
+
+
+def copy_options(file_format):
+    return "(FORMAT binary)" if file_format == 'binary' else "(FORMAT csv, HEADER)"
+
+
+def format_for(path):
+    """Formato do arquivo a partir da extensão (ou ``None`` se não for um arquivo de leituras)."""
+    for file_format, extension in FORMAT_EXTENSIONS.items():
+        if path.endswith(extension):
+            return file_format
+    return None
+
+
+def load_progress(directory):
+    path = os.path.join(directory, PROGRESS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as progress:
+        return json.load(progress)
+
+
+def save_progress(directory, progress):
+    """Grava o progresso de forma atômica, para que uma interrupção não o corrompa."""
+    path = os.path.join(directory, PROGRESS_FILE)
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as output:
+        json.dump(progress, output, indent=2, default=str)
+    os.replace(temporary, path)
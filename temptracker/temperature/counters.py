@@ -0,0 +1,89 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Alert, MonitorSetting, MonitorState
+
+logger = logging.getLogger(__name__)
+
+UNREAD_TOTAL_KEY = "temperature:unread-alerts:total"
+
+
+def _monitor_key(monitor_id):
+    return f"temperature:unread-alerts:{monitor_id}"
+
+
+def unread_alert_count(monitor_id=None):
+    """
+    Quantidade de alertas não lidos, no total ou de um monitor, a partir dos
+    contadores em cache. Na ausência do contador, conta no banco (o total
+    pelo índice parcial de alertas não lidos, o do monitor pelo
+    MonitorState) e grava o resultado no cache.
+    """
+    key = UNREAD_TOTAL_KEY if monitor_id is None else _monitor_key(monitor_id)
+    count = cache.get(key)
+    if count is None:
+        if monitor_id is None:
+            count = Alert.objects.filter(read_confirmation=False).count()
+        else:
+            count = (MonitorState.objects.filter(monitor_setting_id=monitor_id)
+                     .values_list('unread_alert_count', flat=True).first() or 0)
+        cache.add(key, count, timeout=settings.TEMPERATURE_UNREAD_COUNTER_TTL)
+    return count
+
+
+def _add(key, delta):
+    # Contador ausente é recalculado do banco na próxima leitura; não é criado aqui.
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        pass
+
+
+def alerts_created(alerts):
+    """Soma os alertas recém-criados aos contadores (chamar após o commit)."""
+    by_monitor = {}
+    for alert in alerts:
+        by_monitor[alert.monitor_setting_id] = by_monitor.get(alert.monitor_setting_id, 0) + 1
+    if not by_monitor:
+        return
+    _add(UNREAD_TOTAL_KEY, sum(by_monitor.values()))
+    for monitor_id, count in by_monitor.items():
+        _add(_monitor_key(monitor_id), count)
+
+
+def alert_confirmed(alert):
+    """Desconta um alerta confirmado dos contadores."""
+    _add(UNREAD_TOTAL_KEY, -1)
+    _add(_monitor_key(alert.monitor_setting_id), -1)
+
+
+def recount_unread_alerts(monitor_ids=None):
+    """
+    Recalcula no banco (pelo índice parcial de alertas não lidos) e regrava
+    no cache os contadores, corrigindo desvios causados por alterações que
+    não passam pelos incrementos acima, como edições no admin e UPDATEs em
+    lote. Com ``monitor_ids``, recalcula apenas os contadores desses
+    monitores e o total. Executado periodicamente pelo scheduler (todos os
+    monitores) e pelo admin. Retorna o total de alertas não lidos.
+    """
+    monitors = MonitorSetting.objects.all()
+    unread = Alert.objects.filter(read_confirmation=False)
+    if monitor_ids is not None:
+        monitors = monitors.filter(pk__in=monitor_ids)
+        unread_by_monitor = unread.filter(monitor_setting_id__in=monitor_ids)
+    else:
+        unread_by_monitor = unread
+    by_monitor = dict.fromkeys(monitors.values_list('pk', flat=True), 0)
+    by_monitor.update(
+        unread_by_monitor.values('monitor_setting_id')
+        .annotate(unread=Count('id')).values_list('monitor_setting_id', 'unread')
+    )
+    total = sum(by_monitor.values()) if monitor_ids is None else unread.count()
+    counters = {_monitor_key(monitor_id): count for monitor_id, count in by_monitor.items()}
+    counters[UNREAD_TOTAL_KEY] = total
+    cache.set_many(counters, timeout=settings.TEMPERATURE_UNREAD_COUNTER_TTL)
+    logger.info(f"Contadores de alertas não lidos recontados: {total} em {len(by_monitor)} monitores")
+    return total
@@ -0,0 +1,96 @@
+import csv
+import gzip
+import logging
+import os
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Alert, TemperatureReading
+
+logger = logging.getLogger(__name__)
+
+# Políticas de retenção de purge_history: tabela, coluna de tempo usada no
+# corte e filtro adicional. Alertas só são removidos após confirmados.
+PURGE_POLICIES = {
+    'readings': {
+        'table': TemperatureReading._meta.db_table,
+        'time_column': 'timestamp',
+        'filter': '',
+    },
+    'alerts': {
+        'table': Alert._meta.db_table,
+        'time_column': 'alert_timestamp',
+        'filter': 'AND read_confirmation',
+    },
+}
+
+# O lote é escolhido pela chave primária (id crescente) e juntado também
+# pela coluna de tempo, o que permite ao Postgres podar as partições.
+PURGE_CHUNK_SQL = """
+    WITH chunk AS (
+        SELECT id, "{time_column}" AS moment FROM {table}
+        WHERE id > %s AND "{time_column}" < %s {filter}
+        ORDER BY id
+        LIMIT %s
+    )
+    DELETE FROM {table} AS target USING chunk
+    WHERE target.id = chunk.id AND target."{time_column}" = chunk.moment
+    RETURNING target.*
+"""
+
+COUNT_SQL = 'SELECT count(*) FROM {table} WHERE "{time_column}" < %s {filter}'
+
+
+class CsvArchive:
+    """
+    Arquiva as linhas removidas em ``<diretório>/<política>-<data>.csv.gz``,
+    acrescentando ao arquivo do dia (com cabeçalho apenas na criação).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}-{timezone.now():%Y%m%d}.csv.gz")
+
+    def write(self, name, columns, rows):
+        path = self.path(name)
+        is_new = not os.path.exists(path)
+        with gzip.open(path, "at", newline="") as archive:
+            writer = csv.writer(archive)
+            if is_new:
+                writer.writerow(columns)
+            writer.writerows(rows)
+
+
+def count_expired(name, cutoff):
+    policy = PURGE_POLICIES[name]
+    with connection.cursor() as cursor:
+        cursor.execute(COUNT_SQL.format(**policy), [cutoff])
+        return cursor.fetchone()[0]
+
+
+def purge_chunks(name, cutoff, chunk_size, archive=None):
+    """
+    Remove as linhas da política ``name`` anteriores a ``cutoff`` em lotes de
+    até ``chunk_size`` linhas, cada um em sua própria transação curta, e
+    gera a quantidade removida em cada lote. Com ``archive``, as linhas
+    removidas são gravadas antes do commit do lote; uma falha ao arquivar
+    desfaz a remoção.
+    """
+    sql = PURGE_CHUNK_SQL.format(**PURGE_POLICIES[name])
+    last_id = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [last_id, cutoff, chunk_size])
+            rows = cursor.fetchall()
+            if not rows:
+                return
+            columns = [column.name for column in cursor.description]
+            if archive is not None:
+                archive.write(name, columns, rows)
+        id_index = columns.index('id')
+        last_id = max(row[id_index] for row in rows)
+        yield len(rows)
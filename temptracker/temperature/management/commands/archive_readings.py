@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from temptracker.temperature.archive import ArchiveError, archive_readings, get_watermark
+
+
+class Command(BaseCommand):
+    help = (
+        "Move os meses completos de leituras antigas para o arquivo colunar "
+        "(TEMPERATURE_ARCHIVE_DIR), um segmento por monitor e mês, removendo-os do banco. "
+        "A API de leituras continua servindo esses períodos a partir do arquivo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=settings.TEMPERATURE_ARCHIVE_AFTER_DAYS,
+                            help="Arquiva os meses encerrados antes desta idade.")
+        parser.add_argument("--chunk-size", type=int, default=settings.TEMPERATURE_PURGE_CHUNK_SIZE,
+                            help="Linhas removidas do banco por transação.")
+
+    def handle(self, *args, **options):
+        if options["older_than_days"] < 1:
+            raise CommandError("--older-than-days deve ser maior que zero.")
+        before = datetime.now(dt_timezone.utc) - timedelta(days=options["older_than_days"])
+        try:
+            months = archive_readings(before, options["chunk_size"])
+        except (ImproperlyConfigured, ArchiveError) as e:
+            raise CommandError(str(e))
+
+        for month in months:
+            self.stdout.write(f"  {month:%Y-%m} arquivado")
+        watermark = get_watermark()
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(months)} meses arquivados. Marca d'água: {watermark.isoformat() if watermark else 'nenhuma'}."
+        ))
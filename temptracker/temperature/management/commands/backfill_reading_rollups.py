@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from temptracker.temperature.models import TemperatureReading, TemperatureRollup
+from temptracker.temperature.rollups import backfill_rollups, bucket_start
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula os agregados por hora/dia a partir das leituras brutas, um dia por vez. "
+        "Sem --start/--end, cobre todo o período das leituras existentes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="Data inicial (AAAA-MM-DD, UTC).")
+        parser.add_argument("--end", help="Data final, exclusiva (AAAA-MM-DD, UTC).")
+        parser.add_argument("--granularity", choices=[TemperatureRollup.HOUR, TemperatureRollup.DAY],
+                            help="Recalcula apenas esta granularidade.")
+
+    def handle(self, *args, **options):
+        bounds = TemperatureReading.objects.aggregate(first=Min('timestamp'), last=Max('timestamp'))
+        if bounds['first'] is None and not (options["start"] and options["end"]):
+            self.stdout.write("Nenhuma leitura para agregar.")
+            return
+
+        start = self._parse(options["start"]) if options["start"] else bounds['first']
+        end = self._parse(options["end"]) if options["end"] else bounds['last'] + timedelta(days=1)
+        start = bucket_start(start, TemperatureRollup.DAY)
+        end = bucket_start(end, TemperatureRollup.DAY)
+
+        granularities = [options["granularity"]] if options["granularity"] else \
+            [TemperatureRollup.HOUR, TemperatureRollup.DAY]
+
+        day = start
+        total = 0
+        while day < end:
+            for granularity in granularities:
+                total += backfill_rollups(day, day + timedelta(days=1), granularity)
+            day += timedelta(days=1)
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {day:%Y-%m-%d} concluído")
+
+        self.stdout.write(self.style.SUCCESS(f"{total} agregados recalculados de {start:%Y-%m-%d} a {end:%Y-%m-%d}."))
+
+    def _parse(self, value):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=dt_timezone.utc)
+        except ValueError:
+            raise CommandError(f"Data inválida: {value} (use AAAA-MM-DD)")
@@ -0,0 +1,105 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from temptracker.temperature.models import MonitorSetting, TemperatureReading
+
+TIME_RANGES = {'24h': timedelta(hours=24), '7d': timedelta(days=7), '30d': timedelta(days=30)}
+SEED_CHUNK_ROWS = 1_000_000
+CANDIDATE_INDEXES = ['reading_monitor_ts_idx', 'reading_ts_brin', 'reading_ts_id_idx']
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede as consultas por período da API de leituras com EXPLAIN ANALYZE. Para comparar "
+        "índices, use --without-indexes: as consultas são medidas com e sem os índices de "
+        "leituras, removidos dentro de uma transação desfeita ao final (a tabela fica bloqueada "
+        "para escrita durante a medição)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0,
+                            help="Insere esta quantidade de leituras sintéticas antes de medir.")
+        parser.add_argument("--monitors", type=int, default=1000,
+                            help="Quantidade de monitores (inativos) criados para as leituras sintéticas.")
+        parser.add_argument("--days", type=int, default=90,
+                            help="Período, em dias até agora, coberto pelas leituras sintéticas.")
+        parser.add_argument("--repeat", type=int, default=3,
+                            help="Execuções por consulta; é reportado o menor tempo.")
+        parser.add_argument("--location-id", type=int,
+                            help="Também mede as consultas filtradas por esta localidade.")
+        parser.add_argument("--plans", action="store_true", help="Mostra o plano completo de cada consulta.")
+        parser.add_argument("--without-indexes", action="store_true",
+                            help=f"Mede também sem os índices {', '.join(CANDIDATE_INDEXES)}.")
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            self._seed(options["seed"], options["monitors"], options["days"])
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE temperature_temperaturereading")
+
+        self._measure_ranges(options)
+        if options["without_indexes"]:
+            self.stdout.write("Sem índices:")
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for index in CANDIDATE_INDEXES:
+                        cursor.execute(f'DROP INDEX IF EXISTS "{index}"')
+                self._measure_ranges(options)
+                # Os índices voltam com o rollback; nada é alterado no banco.
+                transaction.set_rollback(True)
+
+    def _measure_ranges(self, options):
+        now = timezone.now()
+        for label, delta in TIME_RANGES.items():
+            # Mesma consulta de TemperatureReadingListAPIView
+            queryset = TemperatureReading.objects.filter(timestamp__gte=now - delta).order_by('-timestamp')
+            self._measure(label, queryset, options)
+            if options["location_id"]:
+                self._measure(f"{label} location={options['location_id']}",
+                              queryset.filter(monitor_setting__id=options["location_id"]), options)
+
+    def _measure(self, label, queryset, options):
+        best, plan = None, ""
+        for _ in range(options["repeat"]):
+            plan = queryset.explain(analyze=True, buffers=True)
+            match = re.search(r"Execution Time: ([\d.]+) ms", plan)
+            if match:
+                elapsed = float(match.group(1))
+                best = elapsed if best is None else min(best, elapsed)
+
+        node = plan.splitlines()[0].strip() if plan else ""
+        self.stdout.write(f"{label:>20}: {best if best is not None else '?'} ms  ({node})")
+        if options["plans"]:
+            self.stdout.write(plan + "\n")
+
+    def _seed(self, rows, monitors, days):
+        """Insere leituras em ordem de tempo, distribuídas entre os monitores, via generate_series."""
+        created = MonitorSetting.objects.bulk_create([
+            MonitorSetting(location_name=f"Benchmark {index}", latitude=0, longitude=0,
+                           temperature_limit_celsius=40, monitoring_interval_minutes=15, is_active=False)
+            for index in range(monitors)
+        ])
+        monitor_ids = [monitor.pk for monitor in created]
+        start = timezone.now() - timedelta(days=days)
+        step = timedelta(days=days) / rows
+
+        for offset in range(0, rows, SEED_CHUNK_ROWS):
+            count = min(SEED_CHUNK_ROWS, rows - offset)
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO temperature_temperaturereading
+                        (monitor_setting_id, temperature_celsius, latitude, longitude, timestamp,
+                         generated_notification)
+                    SELECT (%s::bigint[])[1 + (n %% %s)], 15 + random() * 25, 0, 0,
+                           %s + (n * %s), false
+                    FROM generate_series(%s, %s) AS n
+                    """,
+                    [monitor_ids, len(monitor_ids), start, step, offset, offset + count - 1],
+                )
+            self.stdout.write(f"{offset + count}/{rows} leituras inseridas")
@@ -0,0 +1,92 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils.dateparse import parse_datetime
+
+from temptracker.temperature.bulk import (FORMAT_EXTENSIONS, READING_COPY_COLUMNS, READING_TABLE, copy_options,
+                                          load_progress, save_progress)
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta leituras com COPY ... TO STDOUT, em arquivos de até --rows-per-file linhas "
+        "(faixas consecutivas de id). O conteúdo é transmitido direto do Postgres para o disco, "
+        "com memória constante, e o progresso fica em progress.json: reexecutar o comando no "
+        "mesmo diretório continua de onde parou."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Diretório de destino dos arquivos.")
+        parser.add_argument("--format", choices=list(FORMAT_EXTENSIONS), default="csv")
+        parser.add_argument("--monitor", type=int, action="append", dest="monitors",
+                            help="Exporta apenas este monitor (pode ser repetido).")
+        parser.add_argument("--start", help="Início do período (ISO 8601, inclusive).")
+        parser.add_argument("--end", help="Fim do período (ISO 8601, exclusive).")
+        parser.add_argument("--rows-per-file", type=int, default=1_000_000)
+
+    def handle(self, *args, **options):
+        directory = options["directory"]
+        os.makedirs(directory, exist_ok=True)
+        filters, params = self._filters(options)
+
+        progress = load_progress(directory)
+        if progress and progress.get("filters") != params:
+            raise CommandError("O diretório contém uma exportação com outros filtros; use outro diretório.")
+        progress.setdefault("filters", params)
+        progress.setdefault("format", options["format"])
+        progress.setdefault("last_id", 0)
+        progress.setdefault("files", [])
+        progress.setdefault("rows", 0)
+        file_format = progress["format"]
+
+        where = " AND ".join(["id > %s"] + filters)
+        upper_sql = (f"SELECT max(id), count(*) FROM (SELECT id FROM {READING_TABLE} WHERE {where} "
+                     f"ORDER BY id LIMIT %s) AS chunk")
+        columns = ", ".join(f'"{column}"' for column in READING_COPY_COLUMNS)
+        copy_sql = (f"COPY (SELECT {columns} FROM {READING_TABLE} WHERE {where} AND id <= %s ORDER BY id) "
+                    f"TO STDOUT {copy_options(file_format)}")
+
+        started = time.monotonic()
+        exported = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(upper_sql, [progress["last_id"], *params, options["rows_per_file"]])
+                upper, count = cursor.fetchone()
+                if upper is None:
+                    break
+
+                name = f"readings-{len(progress['files']) + 1:06d}{FORMAT_EXTENSIONS[file_format]}"
+                path = os.path.join(directory, name)
+                with open(path, "wb") as output, \
+                        cursor.copy(copy_sql, [progress["last_id"], *params, upper]) as copy:
+                    for data in copy:
+                        output.write(data)
+
+            progress["files"].append(name)
+            progress["last_id"] = upper
+            progress["rows"] += count
+            save_progress(directory, progress)
+
+            exported += count
+            rate = exported / max(time.monotonic() - started, 0.001)
+            self.stdout.write(f"{name}: {count} leituras (total {progress['rows']}, {rate:.0f}/s)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Exportação concluída: {progress['rows']} leituras em {len(progress['files'])} arquivos."
+        ))
+
+    def _filters(self, options):
+        filters, params = [], []
+        if options["monitors"]:
+            filters.append("monitor_setting_id = ANY(%s)")
+            params.append(sorted(options["monitors"]))
+        for name, operator in (("start", ">="), ("end", "<")):
+            if options[name]:
+                moment = parse_datetime(options[name])
+                if moment is None:
+                    raise CommandError(f"Data/hora inválida em --{name}: {options[name]}")
+                filters.append(f'"timestamp" {operator} %s')
+                params.append(moment.isoformat())
+        return filters, params
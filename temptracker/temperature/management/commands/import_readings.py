@@ -0,0 +1,93 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from temptracker.temperature.bulk import (READING_COPY_COLUMNS, READING_TABLE, copy_options, format_for,
+                                          load_progress, save_progress)
+from temptracker.temperature.monitoring import recompute_monitor_states
+
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa os arquivos gerados por export_readings com COPY ... FROM STDIN, um arquivo "
+        "por transação, lendo em blocos com memória constante. Os arquivos concluídos ficam "
+        "registrados em progress.json (chave 'imported'), e reexecutar o comando continua de "
+        "onde parou. Ao final, o estado dos monitores é recalculado; depois da importação, rode "
+        "backfill_reading_rollups para o período importado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Diretório com os arquivos exportados.")
+        parser.add_argument("--new-ids", action="store_true",
+                            help="Não importa os ids; as leituras recebem novos ids da sequência.")
+        parser.add_argument("--ignore-conflicts", action="store_true",
+                            help="Carrega cada arquivo em uma tabela temporária e ignora leituras já existentes.")
+
+    def handle(self, *args, **options):
+        directory = options["directory"]
+        if not os.path.isdir(directory):
+            raise CommandError(f"Diretório não encontrado: {directory}")
+
+        progress = load_progress(directory)
+        imported = progress.setdefault("imported", [])
+        files = sorted(name for name in os.listdir(directory) if format_for(name))
+
+        columns = READING_COPY_COLUMNS
+        target_columns = [column for column in columns if not (options["new_ids"] and column == 'id')]
+
+        started = time.monotonic()
+        total = 0
+        for name in files:
+            if name in imported:
+                continue
+            count = self._import_file(os.path.join(directory, name), format_for(name), columns,
+                                      target_columns, options["ignore_conflicts"])
+            imported.append(name)
+            save_progress(directory, progress)
+
+            total += count
+            rate = total / max(time.monotonic() - started, 0.001)
+            self.stdout.write(f"{name}: {count} leituras (total {total}, {rate:.0f}/s)")
+
+        if total and not options["new_ids"]:
+            self._sync_sequence()
+        if total:
+            # As leituras importadas não passam por record_temperatures.
+            states = recompute_monitor_states()
+            self.stdout.write(f"{states} estados de monitores recalculados.")
+        self.stdout.write(self.style.SUCCESS(f"Importação concluída: {total} leituras importadas."))
+
+    def _import_file(self, path, file_format, columns, target_columns, ignore_conflicts):
+        quoted = ", ".join(f'"{column}"' for column in columns)
+        target = ", ".join(f'"{column}"' for column in target_columns)
+        staging = ignore_conflicts or target_columns != columns
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            table = READING_TABLE
+            if staging:
+                table = "import_readings_staging"
+                cursor.execute(f"CREATE TEMPORARY TABLE {table} (LIKE {READING_TABLE} INCLUDING DEFAULTS) "
+                               f"ON COMMIT DROP")
+
+            with open(path, "rb") as source, \
+                    cursor.copy(f"COPY {table} ({quoted}) FROM STDIN {copy_options(file_format)}") as copy:
+                while data := source.read(COPY_BLOCK_SIZE):
+                    copy.write(data)
+
+            if staging:
+                conflict = " ON CONFLICT DO NOTHING" if ignore_conflicts else ""
+                cursor.execute(f"INSERT INTO {READING_TABLE} ({target}) SELECT {target} FROM {table}{conflict}")
+            return cursor.rowcount
+
+    def _sync_sequence(self):
+        """Avança a sequência de ids para além do maior id importado."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                f"(SELECT COALESCE(max(id), 0) + 1 FROM {READING_TABLE}), false)",
+                [READING_TABLE],
+            )
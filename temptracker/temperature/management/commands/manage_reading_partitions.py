@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from temptracker.temperature.partitions import drop_expired_partitions, ensure_partitions, list_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Cria as partições mensais futuras da tabela de leituras e desanexa/remove as vencidas. "
+        "Também é executado diariamente pelo scheduler."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months-ahead", type=int, default=settings.TEMPERATURE_READING_PARTITION_MONTHS_AHEAD,
+                            help="Meses futuros que devem ter partição.")
+        parser.add_argument("--retention-days", type=int, default=settings.TEMPERATURE_READING_RETENTION_DAYS,
+                            help="Remove partições com leituras mais antigas que isso (0 = manter tudo).")
+        parser.add_argument("--detach-only", action="store_true",
+                            default=settings.TEMPERATURE_READING_RETENTION_DETACH_ONLY,
+                            help="Apenas desanexa as partições vencidas, sem removê-las.")
+        parser.add_argument("--dry-run", action="store_true", help="Apenas mostra as alterações.")
+        parser.add_argument("--list", action="store_true", help="Lista as partições existentes.")
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for name, start, end in list_partitions():
+                self.stdout.write(f"{name}: {start or 'MINVALUE'} -> {end}")
+            return
+
+        created = ensure_partitions(options["months_ahead"], dry_run=options["dry_run"])
+        expired = drop_expired_partitions(options["retention_days"], options["detach_only"],
+                                          dry_run=options["dry_run"])
+
+        suffix = " (simulação)" if options["dry_run"] else ""
+        action = "desanexadas" if options["detach_only"] else "removidas"
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(created)} partições criadas, {len(expired)} {action}{suffix}."
+        ))
+        for name in created + expired:
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {name}")
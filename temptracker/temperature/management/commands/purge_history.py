@@ -0,0 +1,58 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from temptracker.temperature.history import PURGE_POLICIES, CsvArchive, count_expired, purge_chunks
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove leituras e alertas confirmados mais antigos que a retenção configurada "
+        "(TEMPERATURE_PURGE_RETENTION_DAYS), em lotes pequenos por chave primária e com pausa "
+        "entre os lotes, para não manter locks longos. Para leituras em partições inteiramente "
+        "vencidas, prefira manage_reading_partitions, que remove a partição sem DELETE."
+    )
+
+    def add_arguments(self, parser):
+        for name in PURGE_POLICIES:
+            parser.add_argument(f"--{name}-days", type=int, dest=f"{name}_days",
+                                default=settings.TEMPERATURE_PURGE_RETENTION_DAYS.get(name, 0),
+                                help=f"Retenção, em dias, de {name} (0 = manter tudo).")
+        parser.add_argument("--chunk-size", type=int, default=settings.TEMPERATURE_PURGE_CHUNK_SIZE,
+                            help="Linhas removidas por transação.")
+        parser.add_argument("--sleep", type=float, default=settings.TEMPERATURE_PURGE_SLEEP_SECONDS,
+                            help="Pausa, em segundos, entre os lotes.")
+        parser.add_argument("--archive-dir",
+                            help="Arquiva as linhas removidas em CSV compactado neste diretório.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Apenas conta as linhas que seriam removidas.")
+
+    def handle(self, *args, **options):
+        archive = CsvArchive(options["archive_dir"]) if options["archive_dir"] else None
+
+        for name in PURGE_POLICIES:
+            days = options[f"{name}_days"]
+            if not days:
+                continue
+            cutoff = timezone.now() - timedelta(days=days)
+
+            if options["dry_run"]:
+                self.stdout.write(f"{name}: {count_expired(name, cutoff)} linhas anteriores a {cutoff:%Y-%m-%d %H:%M}")
+                continue
+
+            total = 0
+            started = time.monotonic()
+            for deleted in purge_chunks(name, cutoff, options["chunk_size"], archive):
+                total += deleted
+                rate = total / max(time.monotonic() - started, 0.001)
+                self.stdout.write(f"{name}: {total} linhas removidas ({rate:.0f}/s)")
+                if options["sleep"]:
+                    time.sleep(options["sleep"])
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {total} linhas anteriores a {cutoff:%Y-%m-%d %H:%M} removidas"
+                f"{' e arquivadas' if archive and total else ''}."
+            ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from temptracker.temperature.monitoring import recompute_monitor_states
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula o estado mais recente dos monitores (última leitura, último alerta e "
+        "alertas não lidos) a partir das leituras e alertas gravados. Executado também "
+        "por import_readings ao final da importação."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--monitor", type=int, action="append", dest="monitors",
+                            help="Recalcula apenas este monitor (pode ser repetido).")
+
+    def handle(self, *args, **options):
+        count = recompute_monitor_states(options["monitors"])
+        self.stdout.write(self.style.SUCCESS(f"{count} estados de monitores recalculados."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from temptracker.temperature.scheduling import ensure_scheduler_started, reconcile_jobs
+
+
+class Command(BaseCommand):
+    help = "Sincroniza os jobs do scheduler (DjangoJobStore) com os monitores ativos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Apenas mostra as alterações, sem aplicá-las.")
+
+    def handle(self, *args, **options):
+        ensure_scheduler_started()
+        result = reconcile_jobs(dry_run=options["dry_run"])
+
+        for operation, job_ids in result.items():
+            if options["verbosity"] > 1:
+                for job_id in job_ids:
+                    self.stdout.write(f"  {operation}: {job_id}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(result['added'])} adicionados, {len(result['removed'])} removidos, "
+            f"{len(result['updated'])} atualizados."
+        ))
@@ -0,0 +1,121 @@
+import logging
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from temptracker.temperature.partitions import ensure_partitions
+from temptracker.temperature.scheduling import (ensure_scheduler_started,
+                                                reconcile_jobs,
+                                                scheduler)
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Executa o scheduler de monitoramento em um processo dedicado. Vários processos podem "
+        "ser iniciados: um único líder, eleito por advisory lock do Postgres, executa os jobs "
+        "e os demais aguardam para assumir em caso de falha."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lock-id", type=int, default=settings.TEMPERATURE_SCHEDULER_LOCK_ID,
+                            help="Chave do advisory lock usado na eleição do líder.")
+        parser.add_argument("--interval", type=float, default=settings.TEMPERATURE_SCHEDULER_HEARTBEAT_SECONDS,
+                            help="Segundos entre tentativas de eleição e verificações do lock.")
+
+    def handle(self, *args, **options):
+        self.lock_id = options["lock_id"]
+        interval = options["interval"]
+        self.stopping = threading.Event()
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        if settings.TEMPERATURE_SCHEDULER_IN_WEB:
+            logger.warning("TEMPERATURE_SCHEDULER_IN_WEB está ativo: os workers web também executam jobs.")
+
+        ensure_scheduler_started()
+        scheduler.pause()
+        leading = False
+
+        try:
+            while not self.stopping.is_set():
+                if not leading:
+                    leading = self._try_acquire()
+                    if leading:
+                        self.stdout.write(self.style.SUCCESS(f"Processo eleito líder (lock {self.lock_id})."))
+                        self._ensure_partitions()
+                        reconcile_jobs()
+                        scheduler.resume()
+                elif not self._still_holding():
+                    logger.error("Conexão do lock de liderança perdida, pausando o scheduler.")
+                    scheduler.pause()
+                    leading = False
+                else:
+                    # Jobs gravados por outros processos no DjangoJobStore só são
+                    # vistos quando o scheduler reavalia a fila.
+                    scheduler.wakeup()
+
+                self.stopping.wait(interval)
+        finally:
+            scheduler.shutdown(wait=True)
+            if leading:
+                self._release()
+            self.stdout.write("Scheduler encerrado.")
+
+    def _ensure_partitions(self):
+        """
+        Garante as partições das leituras antes de começar a gravar, sem
+        depender do primeiro disparo do job diário de manutenção. Uma falha
+        aqui encerra o processo.
+        """
+        if connection.vendor != "postgresql":
+            return
+        try:
+            created = ensure_partitions()
+        except Exception as e:
+            raise CommandError(f"Não foi possível criar as partições de leituras: {e}")
+        if created:
+            self.stdout.write(f"{len(created)} partições de leituras criadas.")
+
+    def _stop(self, signum, frame):
+        self.stopping.set()
+
+    def _try_acquire(self):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", [self.lock_id])
+                return bool(cursor.fetchone()[0])
+        except Exception as e:
+            logger.error(f"Erro ao tentar adquirir o lock de liderança: {e}")
+            connection.close()
+            return False
+
+    def _still_holding(self):
+        """
+        O advisory lock vale enquanto a sessão existir; basta confirmar que a
+        conexão que o adquiriu continua viva.
+        """
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid() "
+                    "AND classid = %s AND objid = %s AND objsubid = 1 AND granted",
+                    [(self.lock_id >> 32) & 0xFFFFFFFF, self.lock_id & 0xFFFFFFFF],
+                )
+                return cursor.fetchone() is not None
+        except Exception as e:
+            logger.error(f"Erro ao verificar o lock de liderança: {e}")
+            connection.close()
+            return False
+
+    def _release(self):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [self.lock_id])
+        except Exception as e:
+            logger.warning(f"Erro ao liberar o lock de liderança: {e}")
@@ -0,0 +1,83 @@
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from temptracker.temperature.providers import stub_payload
+
+
+class Command(BaseCommand):
+    help = (
+        "Inicia um servidor HTTP local compatível com a Open-Meteo para testes de carga. "
+        "Aponte OPEN_METEO_URL para http://<host>:<porta>/v1/forecast."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency", type=float, default=settings.WEATHER_STUB_LATENCY_SECONDS,
+                            help="Latência (segundos) adicionada a cada resposta.")
+        parser.add_argument("--error-rate", type=float, default=settings.WEATHER_STUB_ERROR_RATE,
+                            help="Fração das requisições respondidas com HTTP 503 (0 a 1).")
+        parser.add_argument("--random", action="store_true", default=settings.WEATHER_STUB_RANDOM,
+                            help="Adiciona ruído aleatório às temperaturas.")
+
+    def handle(self, *args, **options):
+        latency = options["latency"]
+        error_rate = options["error_rate"]
+        randomize = options["random"]
+
+        class StubHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status, body):
+                content = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def do_GET(self):
+                if latency:
+                    time.sleep(latency)
+                if random.random() < error_rate:
+                    self._send(503, {"error": True, "reason": "Erro simulado pelo servidor stub"})
+                    return
+
+                query = parse_qs(urlparse(self.path).query)
+                try:
+                    latitudes = [float(v) for v in query["latitude"][0].split(",")]
+                    longitudes = [float(v) for v in query["longitude"][0].split(",")]
+                    forecast_days = int(query.get("forecast_days", ["1"])[0])
+                except (KeyError, ValueError):
+                    self._send(400, {"error": True, "reason": "Coordenadas inválidas"})
+                    return
+                if len(latitudes) != len(longitudes):
+                    self._send(400, {"error": True, "reason": "Quantidade de latitudes e longitudes divergente"})
+                    return
+
+                kind = "series" if "minutely_15" in query else "current"
+                now = time.time()
+                payloads = [stub_payload(kind, lat, lon, now, randomize, forecast_days)
+                            for lat, lon in zip(latitudes, longitudes)]
+                self._send(200, payloads[0] if len(payloads) == 1 else payloads)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((options["host"], options["port"]), StubHandler)
+        self.stdout.write(self.style.SUCCESS(
+            f"Servidor stub de clima em http://{options['host']}:{options['port']}/v1/forecast "
+            f"(latência {latency}s, erro {error_rate:.0%})"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
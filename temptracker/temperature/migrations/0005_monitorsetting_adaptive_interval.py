@@ -0,0 +1,28 @@
+# Generated by Django 5.1.11 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('temperature', '0004_monitorsetting_notification_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monitorsetting',
+            name='adaptive_interval',
+            field=models.BooleanField(default=False, help_text='Se selecionado, o intervalo de monitoramento passa a ser o máximo e diminui até o intervalo mínimo conforme a temperatura se aproxima do limite.', verbose_name='Intervalo Adaptativo'),
+        ),
+        migrations.AddField(
+            model_name='monitorsetting',
+            name='min_monitoring_interval_minutes',
+            field=models.IntegerField(blank=True, help_text='Intervalo usado, no modo adaptativo, quando a temperatura está no limite ou acima dele.', null=True, verbose_name='Intervalo Mínimo (minutos)'),
+        ),
+        migrations.AddField(
+            model_name='monitorsetting',
+            name='current_interval_minutes',
+            field=models.IntegerField(blank=True, editable=False, help_text='Intervalo calculado após a última leitura no modo adaptativo.', null=True, verbose_name='Intervalo Atual (minutos)'),
+        ),
+    ]
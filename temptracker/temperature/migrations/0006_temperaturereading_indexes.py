@@ -0,0 +1,22 @@
+# Generated by Django 5.1.11 on 2026-10-18 12:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('temperature', '0005_monitorsetting_adaptive_interval'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='temperaturereading',
+            index=models.Index(fields=['monitor_setting', '-timestamp'], name='reading_monitor_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='temperaturereading',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['timestamp'], name='reading_ts_brin'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+from django.db.migrations.exceptions import IrreversibleError
+
+
+def partition_readings(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    from temptracker.temperature.partitions import partition_reading_table
+
+    partition_reading_table(schema_editor.connection)
+
+
+def unpartition_readings(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    raise IrreversibleError(
+        "O particionamento de temperature_temperaturereading não pode ser desfeito por migração. "
+        "Exporte as leituras com export_readings, recrie a tabela sem particionamento e "
+        "reimporte-as com import_readings."
+    )
+
+
+class Migration(migrations.Migration):
+    """
+    Particiona temperature_temperaturereading por mês em ``timestamp``. O
+    estado dos modelos não muda; apenas a estrutura física da tabela.
+
+    Irreversível: voltar para antes desta migração no Postgres levanta
+    IrreversibleError (veja ``unpartition_readings``).
+    """
+
+    dependencies = [
+        ('temperature', '0006_temperaturereading_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_readings, reverse_code=unpartition_readings),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.11 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('temperature', '0007_partition_temperaturereading'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TemperatureRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hora'), ('day', 'Dia')], max_length=4, verbose_name='Granularidade')),
+                ('bucket_start', models.DateTimeField(help_text='Início (UTC) da hora ou do dia agregado.', verbose_name='Início do Período')),
+                ('min_celsius', models.FloatField(verbose_name='Temperatura Mínima (°C)')),
+                ('max_celsius', models.FloatField(verbose_name='Temperatura Máxima (°C)')),
+                ('sum_celsius', models.FloatField(verbose_name='Soma das Temperaturas (°C)')),
+                ('reading_count', models.PositiveIntegerField(verbose_name='Quantidade de Leituras')),
+                ('alert_count', models.PositiveIntegerField(default=0, help_text='Leituras do período que excederam o limite.', verbose_name='Quantidade de Alertas')),
+                ('monitor_setting', models.ForeignKey(help_text='Configuração de monitoramento à qual este agregado pertence.', on_delete=django.db.models.deletion.CASCADE, related_name='temperature_rollups', to='temperature.monitorsetting', verbose_name='Configuração do Monitor')),
+            ],
+            options={
+                'verbose_name': 'Agregado de Temperatura',
+                'verbose_name_plural': 'Agregados de Temperatura',
+                'ordering': ['-bucket_start'],
+                'indexes': [models.Index(fields=['granularity', '-bucket_start'], name='rollup_granularity_start_idx')],
+                'constraints': [models.UniqueConstraint(fields=('monitor_setting', 'granularity', 'bucket_start'), name='rollup_unique_bucket')],
+            },
+        ),
+    ]
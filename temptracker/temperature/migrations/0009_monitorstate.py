@@ -0,0 +1,50 @@
+# Generated by Django 5.1.11 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('temperature', '0008_temperaturerollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonitorState',
+            fields=[
+                ('monitor_setting', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='state', serialize=False, to='temperature.monitorsetting', verbose_name='Configuração do Monitor')),
+                ('last_temperature_celsius', models.FloatField(blank=True, null=True, verbose_name='Última Temperatura (°C)')),
+                ('last_reading_at', models.DateTimeField(blank=True, null=True, verbose_name='Data/Hora da Última Leitura')),
+                ('last_alert_at', models.DateTimeField(blank=True, null=True, verbose_name='Data/Hora do Último Alerta')),
+                ('unread_alert_count', models.PositiveIntegerField(default=0, verbose_name='Alertas Não Lidos')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Estado do Monitor',
+                'verbose_name_plural': 'Estados dos Monitores',
+            },
+        ),
+        # Preenche o estado a partir dos dados existentes
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO temperature_monitorstate
+                    (monitor_setting_id, last_temperature_celsius, last_reading_at, last_alert_at,
+                     unread_alert_count, updated_at)
+                SELECT monitor.id, latest.temperature_celsius, latest."timestamp",
+                       (SELECT max(alert_timestamp) FROM temperature_alert WHERE monitor_setting_id = monitor.id),
+                       (SELECT count(*) FROM temperature_alert
+                        WHERE monitor_setting_id = monitor.id AND NOT read_confirmation),
+                       now()
+                FROM temperature_monitorsetting AS monitor
+                LEFT JOIN LATERAL (
+                    SELECT temperature_celsius, "timestamp" FROM temperature_temperaturereading
+                    WHERE monitor_setting_id = monitor.id
+                    ORDER BY "timestamp" DESC
+                    LIMIT 1
+                ) AS latest ON true
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
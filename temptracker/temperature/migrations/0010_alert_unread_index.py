@@ -0,0 +1,17 @@
+# Generated by Django 5.1.11 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('temperature', '0009_monitorstate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(condition=models.Q(('read_confirmation', False)), fields=['-alert_timestamp'], name='alert_unread_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.11 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('temperature', '0010_alert_unread_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='temperaturereading',
+            index=models.Index(fields=['-timestamp', '-id'], name='reading_ts_id_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='alert',
+            name='alert_unread_ts_idx',
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(condition=models.Q(('read_confirmation', False)), fields=['-alert_timestamp', '-id'], name='alert_unread_ts_id_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.11 on 2026-10-18 12:00
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('temperature', '0011_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='monitorsetting',
+            name='latitude',
+            field=models.FloatField(help_text='Latitude da localidade para monitoramento.', validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)], verbose_name='Latitude'),
+        ),
+        migrations.AlterField(
+            model_name='monitorsetting',
+            name='longitude',
+            field=models.FloatField(help_text='Longitude da localidade para monitoramento.', validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)], verbose_name='Longitude'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def create_default_partition(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    from temptracker.temperature.partitions import ensure_default_partition
+
+    ensure_default_partition(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    """
+    Cria a partição DEFAULT das leituras nas bases particionadas antes dela
+    existir, para que inserções fora das partições mensais não falhem.
+    """
+
+    dependencies = [
+        ('temperature', '0012_monitorsetting_coordinate_validators'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_default_partition, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.11 on 2026-10-18 12:00
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('temperature', '0013_reading_default_partition'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='monitorsetting',
+            name='monitoring_interval_minutes',
+            field=models.IntegerField(help_text='Frequência (em minutos) com que a temperatura será verificada.', validators=[django.core.validators.MinValueValidator(1)], verbose_name='Intervalo de Monitoramento (minutos)'),
+        ),
+        migrations.AlterField(
+            model_name='monitorsetting',
+            name='min_monitoring_interval_minutes',
+            field=models.IntegerField(blank=True, help_text='Intervalo usado, no modo adaptativo, quando a temperatura está no limite ou acima dele.', null=True, validators=[django.core.validators.MinValueValidator(1)], verbose_name='Intervalo Mínimo (minutos)'),
+        ),
+    ]
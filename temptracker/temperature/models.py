@@ -1,17 +1,26 @@
-from django.db import models
-from django_apscheduler.jobstores import DjangoJobStore
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
-import requests
+from django.conf import settings
+from django.contrib.postgres.indexes import BrinIndex
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
+from django.db.models import BigIntegerField, F, Value
+from django.db.models.functions import Coalesce, Mod
 import logging
+from .buffer import get_reading_buffer
 from .email import send_email_alert
+from .scheduling import (PHASE_HASH_MULTIPLIER,
+                         ensure_scheduler_started,
+                         add_monitor_job,
+                         remove_monitor_job,
+                         reschedule_monitor_job,
+                         has_monitor_jobs,
+                         monitor_job_id)
+from .weather import fetch_current_temperature
 
 
 logger = logging.getLogger(__name__)
 
-scheduler = BackgroundScheduler()
-scheduler.add_jobstore(DjangoJobStore(), "default")
-
 
 class MonitorSetting(models.Model):
     """
@@ -23,10 +32,12 @@ class MonitorSetting(models.Model):
         help_text="Nome da localidade a ser monitorada."
     )
     latitude = models.FloatField(
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
         verbose_name="Latitude",
         help_text="Latitude da localidade para monitoramento."
     )
     longitude = models.FloatField(
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
         verbose_name="Longitude",
         help_text="Longitude da localidade para monitoramento."
     )
@@ -35,9 +46,30 @@ class MonitorSetting(models.Model):
         help_text="Temperatura em Celsius que, se excedida, dispara um alerta."
     )
     monitoring_interval_minutes = models.IntegerField(
+        validators=[MinValueValidator(1)],
         verbose_name="Intervalo de Monitoramento (minutos)",
         help_text="Frequência (em minutos) com que a temperatura será verificada."
     )
+    adaptive_interval = models.BooleanField(
+        default=False,
+        verbose_name="Intervalo Adaptativo",
+        help_text="Se selecionado, o intervalo de monitoramento passa a ser o máximo e diminui até o "
+                  "intervalo mínimo conforme a temperatura se aproxima do limite."
+    )
+    min_monitoring_interval_minutes = models.IntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1)],
+        verbose_name="Intervalo Mínimo (minutos)",
+        help_text="Intervalo usado, no modo adaptativo, quando a temperatura está no limite ou acima dele."
+    )
+    current_interval_minutes = models.IntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Intervalo Atual (minutos)",
+        help_text="Intervalo calculado após a última leitura no modo adaptativo."
+    )
     is_active = models.BooleanField(
         default=True,
         verbose_name="Ativar Monitoramento",
@@ -68,57 +100,173 @@ class MonitorSetting(models.Model):
         return f"Monitorando {self.location_name} (Limite: {self.temperature_limit_celsius}°C, Intervalo: {self.monitoring_interval_minutes}min)"
 
     def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        old_instance = None
+        is_new = self._state.adding
+        previous = getattr(self, '_loaded_scheduling', None)
 
-        if not is_new:
-            try:
-                old_instance = MonitorSetting.objects.get(pk=self.pk)
-            except MonitorSetting.DoesNotExist:
-                is_new = True
+        if self.adaptive_interval:
+            # Até a primeira leitura o monitor é verificado no intervalo mínimo.
+            current = self.current_interval_minutes or self._min_interval()
+            self.current_interval_minutes = min(max(current, self._min_interval()), self.monitoring_interval_minutes)
+        else:
+            self.current_interval_minutes = None
 
         super().save(*args, **kwargs)
 
-        job_id = f"monitor_temp_{self.pk}"
+        current = self._scheduling_state()
+        self._loaded_scheduling = current
+        ensure_scheduler_started()
+
+        # Demais campos são lidos pelo job na execução; só is_active e o
+        # intervalo exigem mexer no scheduler.
+        if not is_new and previous == current:
+            return
+
+        job_id = monitor_job_id(self.pk)
 
         try:
-            if not is_new and old_instance:
+            if not self.is_active:
+                if is_new or (previous is not None and not previous[0]):
+                    return
                 try:
-                    scheduler.remove_job(job_id)
+                    remove_monitor_job(self.pk)
                     logger.info(f"Job removido: {job_id}")
                 except Exception as e:
                     logger.error(f"Erro ao remover o job {job_id}: {e}")
+                logger.info(f"Monitoramento desativado para {self.location_name}")
 
-            if self.is_active:
-                scheduler.add_job(
-                    func=self._monitor_temperature,
-                    trigger=IntervalTrigger(minutes=self.monitoring_interval_minutes),
-                    id=job_id,
-                    name=f"Monitor {self.location_name}",
-                    replace_existing=True,
-                    max_instances=1
-                )
+            elif is_new or previous is None or not previous[0]:
+                add_monitor_job(self)
                 logger.info(f"Monitoramento iniciado para {self.location_name} - Job ID: {job_id}")
+
             else:
-                logger.info(f"Monitoramento desativado para {self.location_name}")
+                reschedule_monitor_job(self)
+                logger.info(f"Monitoramento reagendado para {self.location_name}: a cada {self.effective_interval_minutes} min")
 
         except Exception as e:
             logger.error(f"Erro ao configurar monitoramento para {self.location_name}: {str(e)}")
 
-        if not scheduler.running:
-            scheduler.start()
-            logger.info("Scheduler iniciado com sucesso.")
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores carregados dos campos que afetam o agendamento, usados pelo
+        # save() para decidir se o job precisa ser alterado.
+        instance._loaded_scheduling = instance._scheduling_state()
+        return instance
+
+    def _scheduling_state(self):
+        values = self.__dict__
+        interval = values.get('current_interval_minutes') if values.get('adaptive_interval') else None
+        return (values.get('is_active'), interval or values.get('monitoring_interval_minutes'))
+
+    @property
+    def effective_interval_minutes(self):
+        """Intervalo usado no agendamento: o adaptativo, se ativo, ou o configurado."""
+        if self.adaptive_interval and self.current_interval_minutes:
+            return self.current_interval_minutes
+        return self.monitoring_interval_minutes
+
+    @staticmethod
+    def effective_interval_expression():
+        """Equivalente a ``effective_interval_minutes`` para uso em consultas."""
+        # current_interval_minutes só é preenchido com o modo adaptativo ativo (veja save()).
+        return Coalesce('current_interval_minutes', 'monitoring_interval_minutes')
+
+    @staticmethod
+    def phase_expression(interval='interval'):
+        """
+        Equivalente a ``scheduling.phase_offset(pk, intervalo)`` para uso em
+        consultas, sobre a anotação ``interval``. Calculado em bigint: o
+        produto pelo multiplicador não cabe em um inteiro de 32 bits.
+        """
+        return Mod(F('id') * Value(PHASE_HASH_MULTIPLIER, output_field=BigIntegerField()), F(interval),
+                   output_field=BigIntegerField())
+
+    def clean(self):
+        super().clean()
+        minimum, maximum = self.min_monitoring_interval_minutes, self.monitoring_interval_minutes
+        if minimum is not None and maximum is not None and minimum > maximum:
+            raise ValidationError({
+                'min_monitoring_interval_minutes': "O intervalo mínimo não pode ser maior que o intervalo de monitoramento."
+            })
+
+    def _min_interval(self):
+        maximum = self.monitoring_interval_minutes
+        return min(self.min_monitoring_interval_minutes or maximum, maximum)
+
+    def adaptive_interval_for(self, temperature):
+        """
+        Intervalo adaptativo para a última temperatura lida: cresce
+        linearmente do intervalo mínimo (no limite ou acima) até o máximo
+        quando a folga até o limite atinge ``TEMPERATURE_ADAPTIVE_FULL_MARGIN_CELSIUS``.
+        """
+        maximum = self.monitoring_interval_minutes
+        minimum = self._min_interval()
+        margin = self.temperature_limit_celsius - temperature
+        fraction = min(max(margin / settings.TEMPERATURE_ADAPTIVE_FULL_MARGIN_CELSIUS, 0), 1)
+        return max(minimum, int(minimum + (maximum - minimum) * fraction))
+
+    @classmethod
+    def apply_adaptive_intervals(cls, results):
+        """
+        Recalcula o intervalo dos monitores adaptativos a partir das leituras
+        ``(monitor, temperatura)`` e persiste apenas os que mudaram, com um
+        UPDATE por intervalo resultante, reagendando os jobs afetados.
+        """
+        changed = {}
+        for monitor, temperature in results:
+            if not monitor.adaptive_interval:
+                continue
+            interval = monitor.adaptive_interval_for(temperature)
+            if interval != monitor.current_interval_minutes:
+                monitor.current_interval_minutes = interval
+                monitor._loaded_scheduling = monitor._scheduling_state()
+                changed.setdefault(interval, []).append(monitor)
+
+        for interval, monitors in changed.items():
+            cls.objects.filter(pk__in=[monitor.pk for monitor in monitors], adaptive_interval=True) \
+                .update(current_interval_minutes=interval)
+            for monitor in monitors:
+                cls.invalidate_snapshot(monitor.pk)
+            # Fora do modo "per_monitor" o intervalo é lido do banco em cada
+            # tick; basta garantir o job do novo intervalo uma vez.
+            for monitor in (monitors if has_monitor_jobs() else monitors[:1]):
+                try:
+                    reschedule_monitor_job(monitor)
+                except Exception as e:
+                    logger.error(f"Erro ao reagendar {monitor.location_name} para {interval} min: {e}")
+            logger.info(f"Intervalo adaptativo ajustado para {interval} min em {len(monitors)} monitores")
 
-    def delete(self, *args, **kwargs):
-        """Remove o job do scheduler quando o MonitorSetting é deletado"""
-        job_id = f"monitor_temp_{self.pk}"
-        try:
-            scheduler.remove_job(job_id)
-            logger.info(f"Job removido na exclusão: {job_id}")
-        except Exception as e:
-            logger.warning(f"Falha ao remover o job: {e}")
-        logger.info(f"MonitorSetting {self.pk} deletado com sucesso.")
-        super().delete(*args, **kwargs)
+    @staticmethod
+    def _snapshot_cache_key(pk):
+        return f"temperature:monitor-snapshot:{pk}"
+
+    @classmethod
+    def invalidate_snapshot(cls, pk):
+        """
+        Descarta a configuração em cache do monitor (após edição ou exclusão).
+
+        Dentro de uma transação o descarte é adiado para o commit: feito
+        antes, um job concorrente poderia recarregar no cache a versão
+        ainda não confirmada e mantê-la até o fim do TTL.
+        """
+        transaction.on_commit(lambda: cache.delete(cls._snapshot_cache_key(pk)))
+
+    @classmethod
+    def load_snapshot(cls, pk):
+        """
+        Retorna a configuração atual do monitor a partir do cache, lendo do
+        banco apenas quando ausente. Usado pelos jobs, que guardam só o pk,
+        para que edições passem a valer na execução seguinte sem reagendar.
+        Retorna ``None`` se o monitor não existir.
+        """
+        key = cls._snapshot_cache_key(pk)
+        values = cache.get(key)
+        if values is None:
+            values = cls.objects.filter(pk=pk).values(*[field.attname for field in cls._meta.concrete_fields]).first()
+            if values is None:
+                return None
+            cache.set(key, values, timeout=settings.TEMPERATURE_MONITOR_SNAPSHOT_TTL)
+        return cls.from_db('default', list(values), list(values.values()))
 
     def _monitor_temperature(self):
         """
@@ -126,91 +274,39 @@ class MonitorSetting(models.Model):
         """
         try:
             temperature = self._get_current_temperature()
-            reading = TemperatureReading.objects.create(
-                monitor_setting=self,
-                temperature_celsius=temperature,
-                latitude=self.latitude,
-                longitude=self.longitude
-            )
-
-            logger.info(f"Leitura registrada: {reading}")
-
-            if temperature > self.temperature_limit_celsius:
-                alert = Alert.objects.create(
-                    monitor_setting=self,
-                    alert_temperature_celsius=temperature
-                )
-                logger.warning(f"ALERTA CRIADO: {alert}")
-                reading.generated_notification = True
-                reading.save()
-                alert.notify()
+            self._register_reading(temperature)
         except Exception as e:
             logger.error(f"Erro no monitoramento de {self.location_name}: {str(e)}")
 
+    def _register_reading(self, temperature):
+        """
+        Enfileira a leitura no buffer de escrita, que a grava em lote junto
+        com as de outros monitores e dispara o alerta se o limite foi excedido
+        (veja monitoring.record_temperatures).
+        """
+        get_reading_buffer().add(self, temperature)
+        logger.info(f"Leitura enfileirada para {self.location_name}: {temperature}°C")
+
     def _get_current_temperature(self):
         """
         Método para obter a temperatura atual da localidade usando Open-Meteo API
         """
-        try:
-            url = "https://api.open-meteo.com/v1/forecast"
-
-            params = {
-                'latitude': self.latitude,
-                'longitude': self.longitude,
-                'current': 'temperature_2m',
-                'timezone': 'auto',
-                'forecast_days': 1
-            }
-
-            logger.info(f"Fazendo requisição para Open-Meteo API - {self.location_name} ({self.latitude}, {self.longitude})")
-
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()  # Levanta exceção para códigos de erro HTTP
-
-            data = response.json()
-
-            if 'current' in data and 'temperature_2m' in data['current']:
-                temperature = data['current']['temperature_2m']
-
-                if temperature is not None and isinstance(temperature, (int, float)):
-                    temperature = round(float(temperature), 2)
-
-                    logger.info(f"Temperatura obtida com sucesso para {self.location_name}: {temperature}°C")
-                    return temperature
-                else:
-                    raise ValueError("Temperatura retornada é inválida")
-            else:
-                raise ValueError("Dados de temperatura não encontrados na resposta da API")
-
-        except requests.exceptions.Timeout:
-            logger.error(f"Timeout ao obter temperatura para {self.location_name}")
-            raise Exception("Timeout na requisição à API de clima")
-
-        except requests.exceptions.ConnectionError:
-            logger.error(f"Erro de conexão ao obter temperatura para {self.location_name}")
-            raise Exception("Erro de conexão com a API de clima")
-
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"Erro HTTP ao obter temperatura para {self.location_name}: {e}")
-            raise Exception(f"Erro HTTP na API de clima: {e}")
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erro na requisição para {self.location_name}: {e}")
-            raise Exception(f"Erro na requisição à API de clima: {e}")
-
-        except (KeyError, ValueError, TypeError) as e:
-            logger.error(f"Erro ao processar dados da API para {self.location_name}: {e}")
-            raise Exception(f"Erro ao processar dados da API: {e}")
+        logger.info(f"Fazendo requisição para Open-Meteo API - {self.location_name} ({self.latitude}, {self.longitude})")
 
+        try:
+            temperature = fetch_current_temperature(self.latitude, self.longitude)
         except Exception as e:
-            logger.error(f"Erro inesperado ao obter temperatura para {self.location_name}: {str(e)}")
+            logger.error(f"Erro ao obter temperatura para {self.location_name}: {e}")
             raise
 
+        logger.info(f"Temperatura obtida com sucesso para {self.location_name}: {temperature}°C")
+        return temperature
+
     def stop_monitoring(self):
         """Método para parar o monitoramento manualmente"""
-        job_id = f"monitor_temp_{self.pk}"
+        job_id = monitor_job_id(self.pk)
         try:
-            scheduler.remove_job(job_id)
+            remove_monitor_job(self.pk)
             logger.info(f"Monitoramento parado para {self.location_name}")
         except:
             logger.warning(f"Job {job_id} não encontrado para parar")
@@ -219,15 +315,7 @@ class MonitorSetting(models.Model):
         """Método para reiniciar o monitoramento"""
         if self.is_active:
             self.stop_monitoring()
-            job_id = f"monitor_temp_{self.pk}"
-            scheduler.add_job(
-                func=self._monitor_temperature,
-                trigger=IntervalTrigger(minutes=self.monitoring_interval_minutes),
-                id=job_id,
-                name=f"Monitor {self.location_name}",
-                replace_existing=True,
-                max_instances=1
-            )
+            add_monitor_job(self)
             logger.info(f"Monitoramento reiniciado para {self.location_name}")
 
 
@@ -270,11 +358,125 @@ class TemperatureReading(models.Model):
         verbose_name = "Leitura de Temperatura"
         verbose_name_plural = "Leituras de Temperatura"
         ordering = ['-timestamp']
+        indexes = [
+            # Consultas por localidade e período, já na ordem da API
+            models.Index(fields=['monitor_setting', '-timestamp'], name='reading_monitor_ts_idx'),
+            # Consultas por período em todas as localidades: a tabela só recebe
+            # inserções em ordem de tempo, então um BRIN ocupa poucas páginas.
+            BrinIndex(fields=['timestamp'], name='reading_ts_brin'),
+            # Paginação por cursor em (timestamp, id) em todas as localidades
+            models.Index(fields=['-timestamp', '-id'], name='reading_ts_id_idx'),
+        ]
 
     def __str__(self):
         return f"Leitura de {self.monitor_setting.location_name} - {self.temperature_celsius}°C at {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
 
 
+class MonitorState(models.Model):
+    """
+    Estado mais recente de um monitor (última leitura, último alerta e
+    alertas não lidos), mantido na mesma transação da gravação das leituras
+    (veja monitoring.update_monitor_states). Evita buscar a leitura mais
+    recente de cada monitor na tabela de leituras.
+    """
+    monitor_setting = models.OneToOneField(
+        MonitorSetting,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='state',
+        verbose_name="Configuração do Monitor"
+    )
+    last_temperature_celsius = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name="Última Temperatura (°C)"
+    )
+    last_reading_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Data/Hora da Última Leitura"
+    )
+    last_alert_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Data/Hora do Último Alerta"
+    )
+    unread_alert_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Alertas Não Lidos"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Atualizado em"
+    )
+
+    class Meta:
+        verbose_name = "Estado do Monitor"
+        verbose_name_plural = "Estados dos Monitores"
+
+    def __str__(self):
+        return f"Estado de {self.monitor_setting.location_name}: {self.last_temperature_celsius}°C"
+
+
+class TemperatureRollup(models.Model):
+    """
+    Agregado das leituras de um monitor em uma hora ou um dia (UTC), mantido
+    incrementalmente a cada gravação de leituras (veja rollups.update_rollups).
+    Usado pela API para períodos longos no lugar das leituras brutas.
+    """
+    HOUR = 'hour'
+    DAY = 'day'
+    GRANULARITY_CHOICES = [
+        (HOUR, 'Hora'),
+        (DAY, 'Dia'),
+    ]
+
+    monitor_setting = models.ForeignKey(
+        MonitorSetting,
+        on_delete=models.CASCADE,
+        related_name='temperature_rollups',
+        verbose_name="Configuração do Monitor",
+        help_text="Configuração de monitoramento à qual este agregado pertence."
+    )
+    granularity = models.CharField(
+        max_length=4,
+        choices=GRANULARITY_CHOICES,
+        verbose_name="Granularidade"
+    )
+    bucket_start = models.DateTimeField(
+        verbose_name="Início do Período",
+        help_text="Início (UTC) da hora ou do dia agregado."
+    )
+    min_celsius = models.FloatField(verbose_name="Temperatura Mínima (°C)")
+    max_celsius = models.FloatField(verbose_name="Temperatura Máxima (°C)")
+    sum_celsius = models.FloatField(verbose_name="Soma das Temperaturas (°C)")
+    reading_count = models.PositiveIntegerField(verbose_name="Quantidade de Leituras")
+    alert_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Quantidade de Alertas",
+        help_text="Leituras do período que excederam o limite."
+    )
+
+    class Meta:
+        verbose_name = "Agregado de Temperatura"
+        verbose_name_plural = "Agregados de Temperatura"
+        ordering = ['-bucket_start']
+        constraints = [
+            models.UniqueConstraint(fields=['monitor_setting', 'granularity', 'bucket_start'],
+                                    name='rollup_unique_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', '-bucket_start'], name='rollup_granularity_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_granularity_display()} de {self.monitor_setting.location_name} em {self.bucket_start:%Y-%m-%d %H:%M}: média {self.avg_celsius}°C"
+
+    @property
+    def avg_celsius(self):
+        return round(self.sum_celsius / self.reading_count, 2) if self.reading_count else None
+
+
 class Alert(models.Model):
     """
     Representa um alerta disparado quando a temperatura excede um limite.
@@ -310,6 +512,11 @@ class Alert(models.Model):
         verbose_name = "Alerta de Temperatura"
         verbose_name_plural = "Alertas de Temperatura"
         ordering = ['-alert_timestamp']
+        indexes = [
+            # Só os alertas não lidos, que são poucos perto do histórico
+            models.Index(fields=['-alert_timestamp', '-id'], condition=models.Q(read_confirmation=False),
+                         name='alert_unread_ts_id_idx'),
+        ]
 
     def __str__(self):
         return f"ALERTA para {self.monitor_setting.location_name}: {self.alert_temperature_celsius}°C excedeu o limite em {self.alert_timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
@@ -325,7 +532,8 @@ class Alert(models.Model):
                     self.id,
                     self.monitor_setting.temperature_limit_celsius)
                 self.notification_sent = True
-                self.save()
+                # Só este campo: a confirmação de leitura pode ter mudado desde a criação.
+                self.save(update_fields=['notification_sent'])
                 logger.info(f"Notification sent for alert ID {self.id}")
             except Exception as e:
                 logger.error(f"Failed to send notification for alert ID {self.id}: {e}")
@@ -0,0 +1,338 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, F, Q, Value
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from .counters import alerts_created
+from .models import Alert, MonitorSetting, MonitorState, TemperatureReading
+from .notifications import get_notification_dispatcher
+from .rollups import update_rollups
+from .weather import fetch_current_temperatures
+
+logger = logging.getLogger(__name__)
+
+# Último minuto processado pelo modo "priority", monitores adiados no último
+# tick (a processar no seguinte) e estatísticas do último tick
+PRIORITY_LAST_MINUTE_KEY = "temperature:priority-last-minute"
+PRIORITY_SHED_KEY = "temperature:priority-shed"
+SCHEDULER_STATS_KEY = "temperature:scheduler-stats"
+
+
+def run_monitor(pk):
+    """
+    Job do modo "per_monitor": monitora a temperatura do MonitorSetting
+    ``pk`` com a configuração vigente no momento da execução.
+    """
+    monitor = MonitorSetting.load_snapshot(pk)
+    if monitor is None or not monitor.is_active:
+        logger.warning(f"Monitor {pk} inexistente ou inativo, execução ignorada")
+        return
+    monitor._monitor_temperature()
+
+
+def get_due_monitors(now=None):
+    """
+    Retorna os monitores ativos que vencem no minuto do tick.
+
+    Cada monitor tem uma fase fixa dentro do seu intervalo (hash do pk, o
+    mesmo de ``scheduling.phase_offset``) e vence nos minutos em que
+    ``minuto % intervalo == fase``. Assim os monitores se distribuem
+    uniformemente pelos ticks, sem precisar consultar as leituras.
+    """
+    now = now or timezone.now()
+    # Arredonda para tolerar alguns segundos de atraso no disparo do tick.
+    minute = round(now.timestamp() / 60)
+    return list(
+        MonitorSetting.objects.filter(is_active=True)
+        .annotate(interval=MonitorSetting.effective_interval_expression())
+        .filter(interval__gt=0)
+        .annotate(
+            phase=MonitorSetting.phase_expression(),
+            slot=Mod(Value(minute), F('interval'), output_field=BigIntegerField()),
+        )
+        .filter(phase=F('slot'))
+    )
+
+
+def get_pending_monitors(minute, span, carried=()):
+    """
+    Monitores ativos com vencimento em algum dos ``span`` minutos terminados
+    em ``minute`` (inclusive), ordenados por risco. Os monitores ``carried``
+    (adiados em ticks anteriores) são incluídos enquanto o atraso for menor
+    que ``TEMPERATURE_PRIORITY_MAX_CATCHUP_MINUTES``.
+
+    Cada monitor é anotado com ``lag`` (minutos desde o seu último
+    vencimento, ou seja, o atraso acumulado) e ``margin`` (limite menos a
+    última temperatura lida, de MonitorState; nulo se ainda não houver leitura). Monitores
+    sem leitura vêm primeiro, seguidos pelos de menor margem.
+    """
+    return (
+        MonitorSetting.objects.filter(is_active=True)
+        .annotate(interval=MonitorSetting.effective_interval_expression())
+        .filter(interval__gt=0)
+        .annotate(phase=MonitorSetting.phase_expression())
+        .annotate(lag=Mod(Value(minute) - F('phase'), F('interval'), output_field=BigIntegerField()))
+        .filter(Q(lag__lt=span) | Q(pk__in=carried, lag__lt=settings.TEMPERATURE_PRIORITY_MAX_CATCHUP_MINUTES))
+        .annotate(margin=F('temperature_limit_celsius') - F('state__last_temperature_celsius'))
+        .order_by(F('margin').asc(nulls_first=True), '-lag')
+    )
+
+
+def prioritize_monitors(monitors, capacity, at_risk_margin):
+    """
+    Separa ``monitors`` (já ordenados por risco) em ``(processar, descartar)``.
+    Monitores em risco (margem até ``at_risk_margin`` ou sem leitura) são
+    sempre processados; os demais preenchem a capacidade restante do tick
+    (``capacity``, 0 para ilimitada) e o excedente é adiado para o próximo
+    vencimento.
+    """
+    selected, shed = [], []
+    for monitor in monitors:
+        at_risk = monitor.margin is None or monitor.margin <= at_risk_margin
+        if at_risk or not capacity or len(selected) < capacity:
+            selected.append(monitor)
+        else:
+            shed.append(monitor)
+    return selected, shed
+
+
+def get_scheduler_stats():
+    """Estatísticas do último tick do modo "priority" (vazio se ainda não houve tick)."""
+    return cache.get(SCHEDULER_STATS_KEY) or {}
+
+
+STATE_UPSERT_SQL = f"""
+    INSERT INTO {MonitorState._meta.db_table} AS state
+        (monitor_setting_id, last_temperature_celsius, last_reading_at, last_alert_at,
+         unread_alert_count, updated_at)
+    VALUES {{values}}
+    ON CONFLICT (monitor_setting_id) DO UPDATE SET
+        last_temperature_celsius = CASE
+            WHEN state.last_reading_at IS NULL OR EXCLUDED.last_reading_at >= state.last_reading_at
+            THEN EXCLUDED.last_temperature_celsius ELSE state.last_temperature_celsius END,
+        last_reading_at = GREATEST(state.last_reading_at, EXCLUDED.last_reading_at),
+        last_alert_at = GREATEST(state.last_alert_at, EXCLUDED.last_alert_at),
+        unread_alert_count = state.unread_alert_count + EXCLUDED.unread_alert_count,
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+def update_monitor_states(readings, alerts):
+    """
+    Atualiza o estado mais recente dos monitores com as leituras e alertas
+    recém-gravados, com um único INSERT ... ON CONFLICT (linhas ordenadas
+    pelo monitor, para que gravações concorrentes bloqueiem na mesma ordem).
+    """
+    states = {}
+    for reading in readings:
+        state = states.setdefault(reading.monitor_setting_id, [None, None, None, 0])
+        if state[1] is None or reading.timestamp >= state[1]:
+            state[0], state[1] = reading.temperature_celsius, reading.timestamp
+    for alert in alerts:
+        state = states[alert.monitor_setting_id]
+        state[2] = alert.alert_timestamp if state[2] is None else max(state[2], alert.alert_timestamp)
+        state[3] += 1
+    if not states:
+        return
+
+    now = timezone.now()
+    rows = sorted(states.items())
+    params = [value for monitor_id, state in rows for value in (monitor_id, *state, now)]
+    values = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(STATE_UPSERT_SQL.format(values=values), params)
+
+
+STATE_RECOMPUTE_SQL = f"""
+    INSERT INTO {MonitorState._meta.db_table}
+        (monitor_setting_id, last_temperature_celsius, last_reading_at, last_alert_at,
+         unread_alert_count, updated_at)
+    SELECT monitor.id, latest.temperature_celsius, latest."timestamp",
+           (SELECT max(alert_timestamp) FROM {Alert._meta.db_table} WHERE monitor_setting_id = monitor.id),
+           (SELECT count(*) FROM {Alert._meta.db_table}
+            WHERE monitor_setting_id = monitor.id AND NOT read_confirmation),
+           now()
+    FROM {MonitorSetting._meta.db_table} AS monitor
+    LEFT JOIN LATERAL (
+        SELECT temperature_celsius, "timestamp" FROM {TemperatureReading._meta.db_table}
+        WHERE monitor_setting_id = monitor.id
+        ORDER BY "timestamp" DESC
+        LIMIT 1
+    ) AS latest ON true
+    {{where}}
+    ORDER BY monitor.id
+    ON CONFLICT (monitor_setting_id) DO UPDATE SET
+        last_temperature_celsius = EXCLUDED.last_temperature_celsius,
+        last_reading_at = EXCLUDED.last_reading_at,
+        last_alert_at = EXCLUDED.last_alert_at,
+        unread_alert_count = EXCLUDED.unread_alert_count,
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+def recompute_monitor_states(monitor_ids=None):
+    """
+    Recalcula do zero o estado dos monitores (todos, ou os de
+    ``monitor_ids``) a partir das leituras e alertas gravados. Corrige o
+    estado após cargas que não passam por ``record_temperatures``, como
+    ``import_readings``, e desvios do contador de alertas não lidos.
+    Retorna a quantidade de estados gravados.
+    """
+    where, params = "", []
+    if monitor_ids is not None:
+        where, params = "WHERE monitor.id = ANY(%s)", [list(monitor_ids)]
+    with connection.cursor() as cursor:
+        cursor.execute(STATE_RECOMPUTE_SQL.format(where=where), params)
+        return cursor.rowcount
+
+
+def record_temperatures(results):
+    """
+    Persiste em lote as leituras de vários monitores.
+
+    ``results`` é uma sequência de pares ``(monitor, temperatura)``. Leituras
+    e alertas são inseridos com ``bulk_create`` em uma única transação, já
+    com ``generated_notification`` calculado, e somadas aos agregados por
+    hora/dia e ao estado de cada monitor na mesma transação. Após o commit
+    os intervalos adaptativos são ajustados e as notificações entregues ao
+    pool de envio (``notifications``), sem esperar pelo SMTP.
+    """
+    results = list(results)
+    if not results:
+        return []
+
+    with transaction.atomic():
+        readings = TemperatureReading.objects.bulk_create([
+            TemperatureReading(
+                monitor_setting=monitor,
+                temperature_celsius=temperature,
+                latitude=monitor.latitude,
+                longitude=monitor.longitude,
+                generated_notification=temperature > monitor.temperature_limit_celsius
+            )
+            for monitor, temperature in results
+        ])
+        alerts = Alert.objects.bulk_create([
+            Alert(monitor_setting=monitor, alert_temperature_celsius=temperature)
+            for monitor, temperature in results
+            if temperature > monitor.temperature_limit_celsius
+        ])
+        update_rollups(readings)
+        update_monitor_states(readings, alerts)
+
+    logger.info(f"{len(readings)} leituras registradas, {len(alerts)} alertas criados")
+
+    for alert in alerts:
+        logger.warning(f"ALERTA CRIADO: {alert}")
+    if alerts:
+        # Chamado também dentro de transações externas (buffer, importação,
+        # ATOMIC_REQUESTS): contadores e notificações só após o commit.
+        transaction.on_commit(lambda: alerts_created(alerts))
+        transaction.on_commit(lambda: get_notification_dispatcher().submit(alerts))
+
+    MonitorSetting.apply_adaptive_intervals(results)
+    return readings
+
+
+def monitor_temperatures(monitors):
+    """
+    Busca a temperatura de vários monitores em requisições agrupadas e
+    persiste todas as leituras/alertas de uma vez.
+    """
+    monitors = list(monitors)
+    if not monitors:
+        return
+
+    temperatures = fetch_current_temperatures(
+        (monitor.latitude, monitor.longitude) for monitor in monitors
+    )
+
+    results = []
+    for monitor, temperature in zip(monitors, temperatures):
+        if temperature is None:
+            logger.error(f"Temperatura indisponível para {monitor.location_name}, leitura ignorada")
+            continue
+        results.append((monitor, temperature))
+
+    try:
+        record_temperatures(results)
+    except Exception as e:
+        logger.error(f"Erro ao registrar leituras em lote: {str(e)}")
+
+
+def monitor_due_temperatures():
+    """
+    Job do modo em lote: processa todos os monitores vencidos neste tick.
+    """
+    monitors = get_due_monitors()
+    logger.info(f"Tick de monitoramento em lote: {len(monitors)} monitores vencidos")
+    monitor_temperatures(monitors)
+
+
+def monitor_prioritized_temperatures():
+    """
+    Job do modo "priority": como o modo em lote, mas tolerante a atrasos.
+
+    Os vencimentos de todos os minutos desde o último tick processado (até
+    ``TEMPERATURE_PRIORITY_MAX_CATCHUP_MINUTES``) são recuperados de uma vez,
+    de modo que ticks perdidos pelo scheduler não descartam monitores, e
+    vencimentos repetidos de um mesmo monitor viram uma única leitura. Os
+    monitores mais próximos do limite são processados primeiro e, acima de
+    ``TEMPERATURE_PRIORITY_MAX_PER_TICK``, os de baixo risco são adiados
+    para o tick seguinte.
+    """
+    now = timezone.now()
+    minute = round(now.timestamp() / 60)
+    last_minute = cache.get(PRIORITY_LAST_MINUTE_KEY)
+    span = 1 if last_minute is None else min(max(minute - last_minute, 1),
+                                              settings.TEMPERATURE_PRIORITY_MAX_CATCHUP_MINUTES)
+    carried = cache.get(PRIORITY_SHED_KEY) or []
+
+    pending = list(get_pending_monitors(minute, span, carried))
+    selected, shed = prioritize_monitors(
+        pending,
+        settings.TEMPERATURE_PRIORITY_MAX_PER_TICK,
+        settings.TEMPERATURE_PRIORITY_AT_RISK_MARGIN_CELSIUS,
+    )
+    lateness = max((monitor.lag for monitor in pending), default=0)
+
+    if shed or lateness:
+        logger.warning(
+            f"Tick priorizado atrasado/sobrecarregado: {len(pending)} pendentes, atraso de {lateness} min, "
+            f"{len(selected)} processados, {len(shed)} adiados"
+        )
+    else:
+        logger.info(f"Tick de monitoramento priorizado: {len(selected)} monitores vencidos")
+
+    monitor_temperatures(selected)
+    cache.set(PRIORITY_LAST_MINUTE_KEY, minute, timeout=None)
+    cache.set(PRIORITY_SHED_KEY, [monitor.pk for monitor in shed], timeout=None)
+
+    stats = get_scheduler_stats()
+    cache.set(SCHEDULER_STATS_KEY, {
+        'last_tick': now.isoformat(),
+        'pending': len(pending),
+        'processed': len(selected),
+        'shed': len(shed),
+        'shed_total': stats.get('shed_total', 0) + len(shed),
+        'carried': len(carried),
+        'lateness_minutes': lateness,
+    }, timeout=None)
+
+
+def monitor_bucket_temperatures(minutes):
+    """
+    Job do modo por intervalo: processa todos os monitores ativos com
+    intervalo (efetivo) de ``minutes`` minutos, selecionados em uma única consulta.
+    """
+    monitors = list(
+        MonitorSetting.objects.filter(is_active=True)
+        .annotate(interval=MonitorSetting.effective_interval_expression())
+        .filter(interval=minutes)
+    )
+    logger.info(f"Tick do intervalo de {minutes} min: {len(monitors)} monitores")
+    monitor_temperatures(monitors)
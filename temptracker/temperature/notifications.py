@@ -0,0 +1,61 @@
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+class NotificationDispatcher:
+    """
+    Envia as notificações de alerta fora do tick de monitoramento, em um
+    pool de ``workers`` threads. No máximo ``max_pending`` envios ficam
+    pendentes: além disso o alerta é apenas registrado em log e segue com
+    ``notification_sent`` falso, sem acumular memória nem atrasar os ticks
+    enquanto o servidor SMTP estiver lento ou fora do ar.
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        workers = workers or settings.TEMPERATURE_NOTIFICATION_WORKERS
+        max_pending = max_pending or settings.TEMPERATURE_NOTIFICATION_MAX_PENDING
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="alert-notification")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, alerts):
+        for alert in alerts:
+            if not self._slots.acquire(blocking=False):
+                logger.error(f"Fila de notificações cheia, alerta {alert.id} não notificado")
+                continue
+            future = self._executor.submit(self._send, alert)
+            future.add_done_callback(lambda _: self._slots.release())
+
+    def _send(self, alert):
+        close_old_connections()
+        try:
+            alert.notify()
+        finally:
+            close_old_connections()
+
+    def shutdown(self):
+        """Aguarda os envios pendentes."""
+        self._executor.shutdown(wait=True)
+
+
+def get_notification_dispatcher():
+    """
+    Retorna o despachante de notificações compartilhado pelo processo,
+    criando-o na primeira chamada.
+    """
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = NotificationDispatcher()
+                atexit.register(_dispatcher.shutdown)
+    return _dispatcher
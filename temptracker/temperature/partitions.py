@@ -0,0 +1,213 @@
+import logging
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection as default_connection, transaction
+
+logger = logging.getLogger(__name__)
+
+READING_TABLE = "temperature_temperaturereading"
+LEGACY_PARTITION = f"{READING_TABLE}_legacy"
+DEFAULT_PARTITION = f"{READING_TABLE}_default"
+
+_BOUND_PATTERN = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def next_month(moment):
+    return month_start(month_start(moment) + timedelta(days=32))
+
+
+def partition_name(start):
+    return f"{READING_TABLE}_p{start:%Y_%m}"
+
+
+def _parse_bound(value):
+    value = value.strip("'")
+    if value == "MINVALUE":
+        return None
+    return datetime.fromisoformat(value).astimezone(dt_timezone.utc)
+
+
+def list_partitions(connection=None):
+    """
+    Partições da tabela de leituras como ``(nome, início, fim)``, ordenadas
+    pelo início (``None`` para MINVALUE, no caso da partição legada).
+    """
+    connection = connection or default_connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [READING_TABLE],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_PATTERN.search(bound or "")
+        if match:
+            partitions.append((name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+    partitions.sort(key=lambda partition: partition[1] or datetime.min.replace(tzinfo=dt_timezone.utc))
+    return partitions
+
+
+def ensure_default_partition(connection=None):
+    """
+    Cria a partição DEFAULT, que recebe as leituras fora de qualquer faixa
+    mensal: se o job de manutenção deixar de rodar, as inserções continuam
+    funcionando em vez de falhar por falta de partição.
+    """
+    connection = connection or default_connection
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS "{DEFAULT_PARTITION}" PARTITION OF "{READING_TABLE}" DEFAULT')
+
+
+def _create_partition(connection, name, start, end):
+    """
+    Cria a partição ``[start, end)`` como tabela avulsa, move para ela as
+    leituras da faixa que tenham caído na partição DEFAULT e só então a
+    anexa. A restrição CHECK equivalente à faixa permite ao ATTACH dispensar
+    a varredura da nova tabela; depois de anexada ela é redundante e é removida.
+    """
+    bounds = [start.isoformat(), end.isoformat()]
+    check = f"{name}_range_check"
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{READING_TABLE}" INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'ALTER TABLE "{name}" ADD CONSTRAINT "{check}" CHECK ("timestamp" >= %s AND "timestamp" < %s)',
+            bounds,
+        )
+        cursor.execute("SELECT to_regclass(%s)", [f'"{DEFAULT_PARTITION}"'])
+        if cursor.fetchone()[0] is not None:
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE "timestamp" >= %s AND "timestamp" < %s '
+                f'RETURNING *) INSERT INTO "{name}" SELECT * FROM moved',
+                bounds,
+            )
+            if cursor.rowcount:
+                logger.warning(f"{cursor.rowcount} leituras movidas da partição DEFAULT para {name}")
+        cursor.execute(
+            f'ALTER TABLE "{READING_TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+            bounds,
+        )
+        cursor.execute(f'ALTER TABLE "{name}" DROP CONSTRAINT "{check}"')
+
+
+def ensure_partitions(months_ahead=None, now=None, connection=None, dry_run=False):
+    """
+    Cria as partições mensais que faltam, do fim da última partição existente
+    até ``months_ahead`` meses após o mês corrente. Retorna os nomes criados.
+    """
+    connection = connection or default_connection
+    months_ahead = settings.TEMPERATURE_READING_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    now = now or datetime.now(dt_timezone.utc)
+
+    partitions = list_partitions(connection)
+    start = max([end for _, _, end in partitions if end] + [month_start(now)])
+    limit = month_start(now)
+    for _ in range(months_ahead + 1):
+        limit = next_month(limit)
+
+    created = []
+    while start < limit:
+        end = next_month(start)
+        name = partition_name(start)
+        if not dry_run:
+            _create_partition(connection, name, start, end)
+        logger.info(f"Partição de leituras criada: {name}")
+        created.append(name)
+        start = end
+    return created
+
+
+def drop_expired_partitions(retention_days=None, detach_only=None, now=None, connection=None, dry_run=False):
+    """
+    Desanexa (e, a menos que ``detach_only``, remove) as partições cujas
+    leituras são todas mais antigas que ``retention_days`` dias. A retenção
+    vira uma operação de metadados, sem DELETE linha a linha. Com retenção
+    0, nada é feito. Retorna os nomes das partições afetadas.
+    """
+    connection = connection or default_connection
+    retention_days = settings.TEMPERATURE_READING_RETENTION_DAYS if retention_days is None else retention_days
+    detach_only = settings.TEMPERATURE_READING_RETENTION_DETACH_ONLY if detach_only is None else detach_only
+    if not retention_days:
+        return []
+    cutoff = (now or datetime.now(dt_timezone.utc)) - timedelta(days=retention_days)
+
+    expired = [name for name, _, end in list_partitions(connection) if end and end <= cutoff]
+    for name in expired:
+        if dry_run:
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{READING_TABLE}" DETACH PARTITION "{name}"')
+            if not detach_only:
+                cursor.execute(f'DROP TABLE "{name}"')
+        logger.info(f"Partição de leituras {'desanexada' if detach_only else 'removida'}: {name}")
+    return expired
+
+
+def maintain_partitions():
+    """Job diário: cria as partições futuras e aplica a retenção."""
+    if default_connection.vendor != "postgresql":
+        return
+    ensure_partitions()
+    drop_expired_partitions()
+
+
+def partition_reading_table(connection, now=None):
+    """
+    Converte a tabela de leituras em uma tabela particionada por mês em
+    ``timestamp``. A tabela atual vira a partição legada, cobrindo tudo até
+    o início do próximo mês, as partições seguintes são criadas vazias e uma
+    partição DEFAULT recebe o que ficar fora delas.
+
+    A chave primária passa a ser ``(id, timestamp)``, como o Postgres exige
+    para tabelas particionadas, e o id passa a vir de uma sequência
+    compartilhada por todas as partições.
+    """
+    boundary = next_month(now or datetime.now(dt_timezone.utc))
+    statements = [
+        f'ALTER TABLE "{READING_TABLE}" RENAME TO "{LEGACY_PARTITION}"',
+        'ALTER INDEX "reading_monitor_ts_idx" RENAME TO "reading_monitor_ts_idx_legacy"',
+        'ALTER INDEX "reading_ts_brin" RENAME TO "reading_ts_brin_legacy"',
+        f'ALTER TABLE "{LEGACY_PARTITION}" ALTER COLUMN "id" DROP IDENTITY IF EXISTS',
+        f'ALTER TABLE "{LEGACY_PARTITION}" DROP CONSTRAINT "{READING_TABLE}_pkey"',
+        f'CREATE TABLE "{READING_TABLE}" (LIKE "{LEGACY_PARTITION}" INCLUDING DEFAULTS) PARTITION BY RANGE ("timestamp")',
+        f'CREATE SEQUENCE "{READING_TABLE}_id_seq" OWNED BY "{READING_TABLE}"."id"',
+        f"""SELECT setval('"{READING_TABLE}_id_seq"', COALESCE((SELECT max("id") FROM "{LEGACY_PARTITION}"), 0) + 1, false)""",
+        f"""ALTER TABLE "{READING_TABLE}" ALTER COLUMN "id" SET DEFAULT nextval('"{READING_TABLE}_id_seq"')""",
+        f'ALTER TABLE "{READING_TABLE}" ADD PRIMARY KEY ("id", "timestamp")',
+        f'ALTER TABLE "{READING_TABLE}" ADD CONSTRAINT "reading_monitor_setting_fk" FOREIGN KEY ("monitor_setting_id") '
+        f'REFERENCES "temperature_monitorsetting" ("id") DEFERRABLE INITIALLY DEFERRED',
+        f'CREATE INDEX "reading_monitor_ts_idx" ON "{READING_TABLE}" ("monitor_setting_id", "timestamp" DESC)',
+        f'CREATE INDEX "reading_ts_brin" ON "{READING_TABLE}" USING brin ("timestamp")',
+    ]
+    check = f"{LEGACY_PARTITION}_range_check"
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+        # Uma restrição CHECK já validada com a mesma faixa dispensa o ATTACH
+        # de varrer a partição legada; o ATTACH cria nela os índices que faltam.
+        cursor.execute(
+            f'ALTER TABLE "{LEGACY_PARTITION}" ADD CONSTRAINT "{check}" '
+            f'CHECK ("timestamp" IS NOT NULL AND "timestamp" < %s) NOT VALID',
+            [boundary.isoformat()],
+        )
+        cursor.execute(f'ALTER TABLE "{LEGACY_PARTITION}" VALIDATE CONSTRAINT "{check}"')
+        cursor.execute(
+            f'ALTER TABLE "{READING_TABLE}" ATTACH PARTITION "{LEGACY_PARTITION}" FOR VALUES FROM (MINVALUE) TO (%s)',
+            [boundary.isoformat()],
+        )
+        cursor.execute(f'ALTER TABLE "{LEGACY_PARTITION}" DROP CONSTRAINT "{check}"')
+    ensure_partitions(now=now, connection=connection)
+    ensure_default_partition(connection)
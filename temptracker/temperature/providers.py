@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import math
+import random
+import time
+
+from django.conf import settings
+
+from .weather import WeatherAPIError
+
+# Intervalo entre os pontos da série de previsão (minutely_15)
+SERIES_STEP_SECONDS = 900
+
+
+def parse_current_temperature(data):
+    """
+    Extrai a temperatura atual de um objeto de resposta da Open-Meteo.
+    """
+    if 'current' in data and 'temperature_2m' in data['current']:
+        temperature = data['current']['temperature_2m']
+
+        if temperature is not None and isinstance(temperature, (int, float)):
+            return round(float(temperature), 2)
+        raise ValueError("Temperatura retornada é inválida")
+    raise ValueError("Dados de temperatura não encontrados na resposta da API")
+
+
+def parse_series(data):
+    """
+    Extrai a série de previsão de 15 em 15 minutos de um objeto de resposta
+    da Open-Meteo, no formato ``{'time': [...], 'temperature': [...]}`` com
+    instantes em segundos Unix (UTC).
+    """
+    series = data['minutely_15']
+    points = [
+        (int(moment), float(temperature))
+        for moment, temperature in zip(series['time'], series['temperature_2m'])
+        if temperature is not None
+    ]
+    if not points:
+        raise ValueError("Série de previsão vazia na resposta da API")
+    return {'time': [moment for moment, _ in points],
+            'temperature': [temperature for _, temperature in points]}
+
+
+class WeatherProvider:
+    """
+    Interface dos provedores de clima, selecionados por ``WEATHER_PROVIDER``.
+
+    ``kind`` é ``"current"`` (temperatura atual) ou ``"series"`` (série de
+    previsão de 15 em 15 minutos). ``request``/``arequest`` recebem o cliente
+    HTTP (síncrono ou assíncrono) e devolvem um objeto de resposta por
+    coordenada; ``parse`` converte cada objeto no valor usado pelo sistema.
+    """
+
+    def request(self, client, kind, latitudes, longitudes):
+        raise NotImplementedError
+
+    async def arequest(self, client, kind, latitudes, longitudes):
+        raise NotImplementedError
+
+    def parse(self, kind, data):
+        if kind == "series":
+            return parse_series(data)
+        return parse_current_temperature(data)
+
+
+class OpenMeteoProvider(WeatherProvider):
+    """
+    Provedor da API Open-Meteo. A URL pode apontar para o servidor stub
+    (``manage.py run_weather_stub``) para testes de carga sem a API real.
+    """
+
+    def __init__(self, url=None):
+        self.url = url or settings.OPEN_METEO_URL
+
+    def params(self, kind, latitudes, longitudes):
+        # A API aceita listas de latitudes/longitudes separadas por vírgula e,
+        # nesse caso, responde com uma lista de objetos na mesma ordem.
+        params = {
+            'latitude': ','.join(str(lat) for lat in latitudes),
+            'longitude': ','.join(str(lon) for lon in longitudes),
+        }
+        if kind == "series":
+            params.update({
+                'minutely_15': 'temperature_2m',
+                'timezone': 'GMT',
+                'timeformat': 'unixtime',
+                'forecast_days': settings.WEATHER_FORECAST_DAYS
+            })
+        else:
+            params.update({
+                'current': 'temperature_2m',
+                'timezone': 'auto',
+                'forecast_days': 1
+            })
+        return params
+
+    def request(self, client, kind, latitudes, longitudes):
+        return client.request(self.url, self.params(kind, latitudes, longitudes), len(latitudes))
+
+    async def arequest(self, client, kind, latitudes, longitudes):
+        return await client.request(self.url, self.params(kind, latitudes, longitudes), len(latitudes))
+
+
+def stub_temperature(latitude, longitude, moment, randomize=False):
+    """
+    Temperatura sintética para a coordenada no instante ``moment`` (segundos
+    Unix): base pela latitude, ciclo diário pela hora solar local e um desvio
+    fixo derivado da coordenada. Com ``randomize``, soma um ruído gaussiano.
+    """
+    base = 30 - abs(latitude) * 0.4
+    solar_hour = (moment / 3600 + longitude / 15) % 24
+    daily = 6 * math.sin(2 * math.pi * (solar_hour - 9) / 24)
+    seed = int(hashlib.md5(f"{latitude:.4f},{longitude:.4f}".encode()).hexdigest()[:8], 16)
+    offset = (seed % 1000) / 100 - 5
+    temperature = base + daily + offset
+    if randomize:
+        temperature += random.gauss(0, 1.5)
+    return round(temperature, 2)
+
+
+def stub_payload(kind, latitude, longitude, now=None, randomize=False, forecast_days=1):
+    """Objeto de resposta no formato da Open-Meteo para uma coordenada."""
+    now = now if now is not None else time.time()
+    payload = {'latitude': latitude, 'longitude': longitude}
+
+    if kind == "series":
+        start = int(now // 86400 * 86400)
+        times = list(range(start, start + forecast_days * 86400, SERIES_STEP_SECONDS))
+        payload['minutely_15'] = {
+            'time': times,
+            'temperature_2m': [stub_temperature(latitude, longitude, moment, randomize) for moment in times],
+        }
+    else:
+        payload['current'] = {
+            'time': int(now),
+            'temperature_2m': stub_temperature(latitude, longitude, now, randomize),
+        }
+    return payload
+
+
+class StubWeatherProvider(WeatherProvider):
+    """
+    Provedor local, sem rede, para testes de carga do pipeline de
+    monitoramento. Gera temperaturas determinísticas (ou aleatórias, com
+    ``WEATHER_STUB_RANDOM``) com latência e taxa de erro configuráveis.
+    """
+
+    def __init__(self, latency=None, error_rate=None, randomize=None):
+        self.latency = latency if latency is not None else settings.WEATHER_STUB_LATENCY_SECONDS
+        self.error_rate = error_rate if error_rate is not None else settings.WEATHER_STUB_ERROR_RATE
+        self.randomize = randomize if randomize is not None else settings.WEATHER_STUB_RANDOM
+
+    def _payloads(self, kind, latitudes, longitudes):
+        if random.random() < self.error_rate:
+            raise WeatherAPIError("Erro simulado pelo provedor stub")
+        now = time.time()
+        return [stub_payload(kind, lat, lon, now, self.randomize, settings.WEATHER_FORECAST_DAYS)
+                for lat, lon in zip(latitudes, longitudes)]
+
+    def request(self, client, kind, latitudes, longitudes):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._payloads(kind, latitudes, longitudes)
+
+    async def arequest(self, client, kind, latitudes, longitudes):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._payloads(kind, latitudes, longitudes)
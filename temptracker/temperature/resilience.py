@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import threading
+import time
+
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+# Balde de fichas atômico no Redis. O relógio usado é o do próprio Redis,
+# para que todos os processos reabasteçam o balde na mesma base de tempo.
+TOKEN_BUCKET_SCRIPT = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+    allowed = 1
+else
+    wait = (requested - tokens) / rate
+end
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+
+class CircuitOpenError(Exception):
+    """Requisição recusada porque o circuito está aberto."""
+
+
+class TokenBucket:
+    """
+    Limitador de taxa por balde de fichas.
+
+    Quando o cache ``cache_alias`` é o Redis (django-redis), o estado do
+    balde fica no Redis e é compartilhado por todos os processos; caso
+    contrário, cai para um balde local ao processo.
+    """
+
+    def __init__(self, key, rate, capacity, cache_alias="default"):
+        self.key = key
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._script = None
+
+        cache = caches[cache_alias]
+        if type(cache).__module__.startswith("django_redis"):
+            from django_redis import get_redis_connection
+            self._script = get_redis_connection(cache_alias).register_script(TOKEN_BUCKET_SCRIPT)
+
+    def _take_local(self, tokens):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def _take(self, tokens):
+        """Tenta consumir ``tokens``; retorna 0 ou os segundos até haver fichas."""
+        if self._script is None:
+            return self._take_local(tokens)
+        try:
+            allowed, wait = self._script(keys=[self.key], args=[self.rate, self.capacity, tokens])
+        except Exception as e:
+            logger.warning(f"Falha no limitador de taxa compartilhado, usando limite local: {e}")
+            return self._take_local(tokens)
+        return 0.0 if int(allowed) else float(wait)
+
+    def acquire(self, tokens=1, timeout=0):
+        """
+        Consome ``tokens`` fichas, aguardando até ``timeout`` segundos.
+        Retorna ``False`` se não houver fichas dentro do prazo.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._take(tokens)
+            if not wait:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1, timeout=0):
+        """Versão de ``acquire`` que aguarda sem bloquear o event loop."""
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._take(tokens)
+            if not wait:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Disjuntor para chamadas à API externa.
+
+    Após ``failure_threshold`` falhas consecutivas o circuito abre e todas as
+    chamadas são recusadas imediatamente por ``reset_timeout`` segundos.
+    Passado esse prazo o circuito fica semiaberto: uma única chamada de
+    teste é liberada e, conforme seu resultado, o circuito fecha ou volta a
+    abrir. ``trip`` abre o circuito de imediato, por um prazo informado pela
+    própria API (ex.: ``Retry-After`` de uma resposta 429).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.open_for = reset_timeout
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Levanta ``CircuitOpenError`` se a chamada não deve ser feita."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.open_for:
+                self.state = self.HALF_OPEN
+                self._probing = False
+                logger.info("Circuito da API de clima semiaberto, liberando chamada de teste")
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+        raise CircuitOpenError("Circuito aberto: API de clima indisponível")
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuito da API de clima fechado")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuito da API de clima aberto após {self.failures} falhas")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.open_for = self.reset_timeout
+                self._probing = False
+
+    def trip(self, open_for=None):
+        """
+        Abre o circuito imediatamente, sem esperar ``failure_threshold``
+        falhas, por ``open_for`` segundos (``reset_timeout`` se omitido).
+        """
+        with self._lock:
+            self.failures += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.open_for = self.reset_timeout if open_for is None else open_for
+            self._probing = False
+        logger.warning(f"Circuito da API de clima aberto por {self.open_for:.0f}s")
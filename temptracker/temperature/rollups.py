@@ -0,0 +1,97 @@
+import logging
+from collections import defaultdict
+from datetime import timezone as dt_timezone
+
+from django.db import connection, transaction
+
+from .models import TemperatureRollup
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TABLE = TemperatureRollup._meta.db_table
+READING_TABLE = "temperature_temperaturereading"
+
+# Soma o lote de leituras aos agregados existentes
+UPSERT_SQL = f"""
+    INSERT INTO {ROLLUP_TABLE} AS rollup
+        (monitor_setting_id, granularity, bucket_start, min_celsius, max_celsius,
+         sum_celsius, reading_count, alert_count)
+    VALUES {{values}}
+    ON CONFLICT (monitor_setting_id, granularity, bucket_start) DO UPDATE SET
+        min_celsius = LEAST(rollup.min_celsius, EXCLUDED.min_celsius),
+        max_celsius = GREATEST(rollup.max_celsius, EXCLUDED.max_celsius),
+        sum_celsius = rollup.sum_celsius + EXCLUDED.sum_celsius,
+        reading_count = rollup.reading_count + EXCLUDED.reading_count,
+        alert_count = rollup.alert_count + EXCLUDED.alert_count
+"""
+
+# Recalcula os agregados de um período a partir das leituras brutas
+BACKFILL_SQL = f"""
+    INSERT INTO {ROLLUP_TABLE}
+        (monitor_setting_id, granularity, bucket_start, min_celsius, max_celsius,
+         sum_celsius, reading_count, alert_count)
+    SELECT monitor_setting_id, %(granularity)s,
+           date_trunc(%(granularity)s, "timestamp" AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+           min(temperature_celsius), max(temperature_celsius), sum(temperature_celsius),
+           count(*), count(*) FILTER (WHERE generated_notification)
+    FROM {READING_TABLE}
+    WHERE "timestamp" >= %(start)s AND "timestamp" < %(end)s
+    GROUP BY 1, 3
+    ON CONFLICT (monitor_setting_id, granularity, bucket_start) DO UPDATE SET
+        min_celsius = EXCLUDED.min_celsius,
+        max_celsius = EXCLUDED.max_celsius,
+        sum_celsius = EXCLUDED.sum_celsius,
+        reading_count = EXCLUDED.reading_count,
+        alert_count = EXCLUDED.alert_count
+"""
+
+
+def bucket_start(moment, granularity):
+    """Início (UTC) da hora ou do dia que contém ``moment``."""
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if granularity == TemperatureRollup.DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def update_rollups(readings):
+    """
+    Soma as leituras recém-gravadas aos agregados por hora e por dia, com um
+    único INSERT ... ON CONFLICT. As leituras são primeiro agregadas em
+    memória e as linhas ordenadas pela chave, para que gravações concorrentes
+    bloqueiem os agregados na mesma ordem.
+    """
+    buckets = defaultdict(lambda: [None, None, 0.0, 0, 0])
+    for reading in readings:
+        for granularity, _ in TemperatureRollup.GRANULARITY_CHOICES:
+            key = (reading.monitor_setting_id, granularity, bucket_start(reading.timestamp, granularity))
+            bucket = buckets[key]
+            temperature = reading.temperature_celsius
+            bucket[0] = temperature if bucket[0] is None else min(bucket[0], temperature)
+            bucket[1] = temperature if bucket[1] is None else max(bucket[1], temperature)
+            bucket[2] += temperature
+            bucket[3] += 1
+            bucket[4] += int(reading.generated_notification)
+    if not buckets:
+        return 0
+
+    rows = sorted(buckets.items())
+    params = [value for key, bucket in rows for value in (*key, *bucket)]
+    values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(UPSERT_SQL.format(values=values), params)
+    return len(rows)
+
+
+def backfill_rollups(start, end, granularity):
+    """
+    Recalcula, a partir das leituras brutas, os agregados de ``granularity``
+    cujos períodos estão entre ``start`` (inclusive) e ``end`` (exclusive).
+    Os limites devem estar alinhados à granularidade. Retorna a quantidade de
+    agregados gravados.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(BACKFILL_SQL, {'granularity': granularity, 'start': start, 'end': end})
+        count = cursor.rowcount
+    logger.info(f"Agregados por {granularity} recalculados de {start} a {end}: {count}")
+    return count
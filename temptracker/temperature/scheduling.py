@@ -0,0 +1,331 @@
+import logging
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from django.conf import settings
+from django.db import transaction
+from django_apscheduler.jobstores import DjangoJobStore
+from django_apscheduler.models import DjangoJob
+
+logger = logging.getLogger(__name__)
+
+scheduler = BackgroundScheduler()
+scheduler.add_jobstore(DjangoJobStore(), "default")
+
+BATCH_JOB_ID = "monitor_temp_batch"
+PRIORITY_JOB_ID = "monitor_temp_priority"
+MAINTENANCE_JOB_ID = "maintenance_reading_partitions"
+UNREAD_RECOUNT_JOB_ID = "maintenance_unread_alert_counters"
+# Prefixos dos jobs gerenciados por este módulo (usados na reconciliação)
+MANAGED_JOB_PREFIXES = ("monitor_temp_", "monitor_bucket_")
+
+# Multiplicador de Knuth para hash multiplicativo: pks consecutivos caem em
+# fases bem distribuídas ao longo do intervalo.
+PHASE_HASH_MULTIPLIER = 2654435761
+
+
+def phase_offset(key, period):
+    """
+    Deslocamento determinístico de ``key`` dentro de ``period`` (0 a
+    ``period - 1``). O mesmo monitor sempre recebe a mesma fase, inclusive
+    após recriar os jobs, e monitores diferentes se espalham pelo intervalo.
+    """
+    return (key * PHASE_HASH_MULTIPLIER) % period
+
+
+def phased_trigger(key, minutes):
+    """
+    IntervalTrigger de ``minutes`` minutos cuja grade de execuções é alinhada
+    à época Unix e deslocada pela fase de ``key``, com jitter opcional
+    (``TEMPERATURE_SCHEDULE_JITTER_SECONDS``). Assim, jobs criados ou
+    recriados ao mesmo tempo não disparam todos no mesmo segundo.
+    """
+    period = minutes * 60
+    now = datetime.now(timezone.utc).timestamp()
+    start = now - now % period + phase_offset(key, period)
+    return IntervalTrigger(
+        minutes=minutes,
+        start_date=datetime.fromtimestamp(start, timezone.utc),
+        jitter=settings.TEMPERATURE_SCHEDULE_JITTER_SECONDS or None,
+    )
+
+
+# Executáveis do utilitário de linha de comando do Django
+MANAGEMENT_ENTRYPOINTS = ("manage.py", "django-admin", "django-admin.py")
+
+
+def is_web_process():
+    """
+    Indica se este processo atende requisições: um servidor WSGI/ASGI
+    (gunicorn, uvicorn, ...) ou o processo filho do ``runserver`` que serve
+    as requisições (o processo pai apenas recarrega o código). Os demais
+    comandos de gerenciamento (migrate, shell, test, ...) não são processos web.
+    """
+    if os.path.basename(sys.argv[0]) not in MANAGEMENT_ENTRYPOINTS:
+        return True
+    if sys.argv[1:2] != ["runserver"]:
+        return False
+    return os.environ.get("RUN_MAIN") == "true" or "--noreload" in sys.argv
+
+
+def runs_jobs_in_process():
+    """
+    Indica se este processo executa os jobs. Por padrão apenas o processo
+    ``manage.py run_monitor_scheduler`` eleito como líder executa jobs; os
+    workers web só gravam/removem jobs no DjangoJobStore. Com
+    ``TEMPERATURE_SCHEDULER_IN_WEB``, os processos web também executam.
+    """
+    return settings.TEMPERATURE_SCHEDULER_IN_WEB and is_web_process()
+
+
+def ensure_scheduler_started():
+    """
+    Inicia o scheduler deste processo. Fora do processo dedicado ele é
+    iniciado pausado: ``add_job``/``remove_job`` continuam gravando no
+    DjangoJobStore, mas nenhum job é executado aqui.
+    """
+    if scheduler.running:
+        return
+    paused = not runs_jobs_in_process()
+    scheduler.start(paused=paused)
+    logger.info(f"Scheduler iniciado{' (pausado, sem execução de jobs)' if paused else ''}.")
+
+
+def is_batch_mode():
+    """Indica se os monitores são processados por um único job em lote (com ou sem prioridade)."""
+    return settings.TEMPERATURE_SCHEDULING_MODE in ("batch", "priority")
+
+
+def is_priority_mode():
+    """Indica se o job em lote prioriza monitores próximos do limite e descarta carga."""
+    return settings.TEMPERATURE_SCHEDULING_MODE == "priority"
+
+
+def is_bucket_mode():
+    """Indica se os monitores são processados por um job por intervalo."""
+    return settings.TEMPERATURE_SCHEDULING_MODE == "bucket"
+
+
+def has_monitor_jobs():
+    """Indica se cada monitor tem seu próprio job (modo "per_monitor")."""
+    return not (is_batch_mode() or is_bucket_mode())
+
+
+def monitor_job_id(pk):
+    return f"monitor_temp_{pk}"
+
+
+def bucket_job_id(minutes):
+    return f"monitor_bucket_{minutes}"
+
+
+def batch_job_id():
+    return PRIORITY_JOB_ID if is_priority_mode() else BATCH_JOB_ID
+
+
+def ensure_batch_job():
+    """
+    Garante que o job em lote exista. Ele roda a cada minuto e processa, em
+    requisições agrupadas, todos os monitores cujo intervalo já venceu.
+    """
+    if scheduler.get_job(batch_job_id()):
+        return
+    _add_batch_job()
+
+
+def _add_batch_job():
+    if is_priority_mode():
+        func, name = "temptracker.temperature.monitoring:monitor_prioritized_temperatures", "Monitoramento em lote priorizado"
+    else:
+        func, name = "temptracker.temperature.monitoring:monitor_due_temperatures", "Monitoramento em lote"
+    # Alinhado ao início de cada minuto: o vencimento dos monitores é
+    # calculado a partir do minuto do tick (veja monitoring.get_due_monitors).
+    now = datetime.now(timezone.utc).timestamp()
+    scheduler.add_job(
+        func=func,
+        trigger=IntervalTrigger(minutes=1, start_date=datetime.fromtimestamp(now - now % 60, timezone.utc)),
+        id=batch_job_id(),
+        name=name,
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+    logger.info(f"Job em lote criado: {batch_job_id()}")
+
+
+def ensure_bucket_job(minutes):
+    """
+    Garante que exista o job do intervalo ``minutes``. Ele processa, em uma
+    única execução, todos os monitores ativos com esse intervalo, de modo que
+    a quantidade de jobs depende apenas do número de intervalos distintos.
+    """
+    job_id = bucket_job_id(minutes)
+    if scheduler.get_job(job_id):
+        return
+    _add_bucket_job(minutes)
+
+
+def _add_bucket_job(minutes):
+    job_id = bucket_job_id(minutes)
+    scheduler.add_job(
+        func="temptracker.temperature.monitoring:monitor_bucket_temperatures",
+        trigger=phased_trigger(minutes, minutes),
+        args=[minutes],
+        id=job_id,
+        name=f"Monitoramento a cada {minutes} min",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+    logger.info(f"Job de intervalo criado: {job_id}")
+
+
+def add_monitor_job(monitor):
+    """Agenda o monitoramento de um MonitorSetting conforme o modo configurado."""
+    if is_batch_mode():
+        ensure_batch_job()
+        return
+    if is_bucket_mode():
+        ensure_bucket_job(monitor.effective_interval_minutes)
+        return
+
+    # O job guarda apenas uma referência textual à função e o pk; a
+    # configuração do monitor é carregada na execução (MonitorSetting.load_snapshot).
+    scheduler.add_job(
+        func="temptracker.temperature.monitoring:run_monitor",
+        trigger=phased_trigger(monitor.pk, monitor.effective_interval_minutes),
+        args=[monitor.pk],
+        id=monitor_job_id(monitor.pk),
+        name=f"Monitor {monitor.location_name}",
+        replace_existing=True,
+        max_instances=1
+    )
+
+
+def reschedule_monitor_job(monitor):
+    """
+    Aplica um novo intervalo ao agendamento de um monitor já ativo, sem
+    remover e recriar o job.
+    """
+    if is_batch_mode():
+        # O tick em lote lê o intervalo do banco a cada execução.
+        return
+    if is_bucket_mode():
+        ensure_bucket_job(monitor.effective_interval_minutes)
+        return
+    try:
+        scheduler.reschedule_job(
+            monitor_job_id(monitor.pk),
+            trigger=phased_trigger(monitor.pk, monitor.effective_interval_minutes),
+        )
+    except JobLookupError:
+        add_monitor_job(monitor)
+
+
+def remove_monitor_job(pk):
+    """
+    Remove o job individual de um monitor. Nos modos em lote e por
+    intervalo não há job por monitor, então nada é feito.
+    """
+    if not has_monitor_jobs():
+        return
+    scheduler.remove_job(monitor_job_id(pk))
+
+
+def ensure_maintenance_jobs():
+    """
+    Agenda as rotinas de manutenção, independentes do modo de agendamento
+    dos monitores: a diária das leituras (partições futuras e retenção) e a
+    recontagem periódica dos alertas não lidos.
+    """
+    scheduler.add_job(
+        func="temptracker.temperature.partitions:maintain_partitions",
+        trigger=CronTrigger(hour=3, minute=0, timezone=timezone.utc),
+        id=MAINTENANCE_JOB_ID,
+        name="Manutenção das partições de leituras",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+    scheduler.add_job(
+        func="temptracker.temperature.counters:recount_unread_alerts",
+        trigger=IntervalTrigger(minutes=settings.TEMPERATURE_UNREAD_RECOUNT_MINUTES),
+        id=UNREAD_RECOUNT_JOB_ID,
+        name="Recontagem dos alertas não lidos",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+
+
+def _desired_jobs():
+    """
+    Jobs esperados para o modo configurado, como ``{job_id: (minutos, criar)}``,
+    onde ``criar`` agenda o job. Faz uma única consulta aos monitores ativos.
+    """
+    from .models import MonitorSetting
+
+    if is_batch_mode():
+        return {batch_job_id(): (1, _add_batch_job)}
+
+    active = MonitorSetting.objects.filter(is_active=True)
+    if is_bucket_mode():
+        intervals = (active.annotate(interval=MonitorSetting.effective_interval_expression())
+                     .values_list('interval', flat=True).distinct())
+        return {bucket_job_id(minutes): (minutes, lambda minutes=minutes: _add_bucket_job(minutes))
+                for minutes in intervals}
+
+    monitors = active.only('id', 'location_name', 'monitoring_interval_minutes',
+                           'adaptive_interval', 'current_interval_minutes')
+    return {monitor_job_id(monitor.pk): (monitor.effective_interval_minutes,
+                                         lambda monitor=monitor: add_monitor_job(monitor))
+            for monitor in monitors}
+
+
+def reconcile_jobs(dry_run=False):
+    """
+    Sincroniza os jobs do scheduler com os monitores ativos.
+
+    Carrega todos os jobs (uma consulta ao DjangoJobStore) e os monitores
+    ativos (uma consulta) e calcula em memória o que adicionar, remover ou
+    atualizar (intervalo ou função divergente). As alterações são aplicadas
+    em uma única transação: as remoções em um só DELETE; as inclusões e
+    atualizações passam por ``scheduler.add_job``, uma escrita no
+    DjangoJobStore por job, já que o estado serializado de cada job é
+    montado pelo APScheduler.
+    Retorna um dicionário com as listas de ids de cada operação.
+    """
+    existing = {job.id: job for job in scheduler.get_jobs()
+                if job.id.startswith(MANAGED_JOB_PREFIXES)}
+    desired = _desired_jobs()
+
+    to_remove = [job_id for job_id in existing if job_id not in desired]
+    to_add = [job_id for job_id in desired if job_id not in existing]
+    to_update = [
+        job_id for job_id, (minutes, _) in desired.items()
+        if job_id in existing and (
+            getattr(existing[job_id].trigger, 'interval', None) != timedelta(minutes=minutes)
+            or not existing[job_id].func_ref.startswith("temptracker.temperature.monitoring:")
+        )
+    ]
+    result = {'added': to_add, 'removed': to_remove, 'updated': to_update}
+
+    if not dry_run:
+        with transaction.atomic():
+            if to_remove:
+                DjangoJob.objects.filter(id__in=to_remove).delete()
+            for job_id in to_add + to_update:
+                desired[job_id][1]()
+            ensure_maintenance_jobs()
+        scheduler.wakeup()
+
+    logger.info(
+        f"Reconciliação de jobs{' (simulação)' if dry_run else ''}: {len(to_add)} adicionados, "
+        f"{len(to_remove)} removidos, {len(to_update)} atualizados, {len(existing)} existentes"
+    )
+    return result
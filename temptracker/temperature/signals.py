@@ -0,0 +1,32 @@
+import logging
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import MonitorSetting
+from .scheduling import monitor_job_id, remove_monitor_job
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=MonitorSetting, dispatch_uid="temperature_monitor_saved")
+def monitor_saved(sender, instance, **kwargs):
+    """Descarta a configuração em cache do monitor salvo."""
+    MonitorSetting.invalidate_snapshot(instance.pk)
+
+
+@receiver(post_delete, sender=MonitorSetting, dispatch_uid="temperature_monitor_deleted")
+def monitor_deleted(sender, instance, **kwargs):
+    """
+    Remove o job e a configuração em cache do monitor excluído. Como sinal,
+    cobre também exclusões em lote (``QuerySet.delete()``, ação do admin),
+    que não passam por ``MonitorSetting.delete()``.
+    """
+    job_id = monitor_job_id(instance.pk)
+    try:
+        remove_monitor_job(instance.pk)
+        logger.info(f"Job removido na exclusão: {job_id}")
+    except Exception as e:
+        logger.warning(f"Falha ao remover o job {job_id}: {e}")
+    MonitorSetting.invalidate_snapshot(instance.pk)
+    logger.info(f"MonitorSetting {instance.pk} deletado com sucesso.")
@@ -0,0 +1,18 @@
+from factory import Faker
+from factory.django import DjangoModelFactory
+
+from temptracker.temperature.models import MonitorSetting
+
+
+class MonitorSettingFactory(DjangoModelFactory[MonitorSetting]):
+    location_name = Faker("city")
+    latitude = Faker("pyfloat", min_value=-90, max_value=90)
+    longitude = Faker("pyfloat", min_value=-180, max_value=180)
+    temperature_limit_celsius = 30.0
+    monitoring_interval_minutes = 15
+    # Inativo por padrão: salvar um monitor ativo agenda um job no scheduler.
+    is_active = False
+    notification_email = Faker("email")
+
+    class Meta:
+        model = MonitorSetting
@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from temptracker.temperature import archive
+from temptracker.temperature.archive import (ArchiveError, ArchiveSegment, archive_readings, read_history,
+                                             read_latest_history, segment_path, verify_segment, write_segment)
+from temptracker.temperature.models import TemperatureReading
+from temptracker.temperature.tests.factories import MonitorSettingFactory
+
+JANUARY = datetime(2026, 1, 1, tzinfo=timezone.utc)
+FEBRUARY = datetime(2026, 2, 1, tzinfo=timezone.utc)
+
+
+def month_rows(month, first_id, count):
+    return [(first_id + index, month + timedelta(hours=index, microseconds=index), 20.0 + index * 0.25, index % 3 == 0)
+            for index in range(count)]
+
+
+@pytest.fixture
+def segment(tmp_path):
+    rows = month_rows(JANUARY, 1, 6)
+    path = segment_path(1, JANUARY, str(tmp_path))
+    write_segment(path, rows)
+    return path, rows
+
+
+class TestArchiveSegment:
+    def test_round_trip(self, segment):
+        path, rows = segment
+        with ArchiveSegment(path) as archived:
+            assert archived.count == len(rows)
+            assert list(archived.rows()) == rows
+
+    def test_rows_in_range(self, segment):
+        path, rows = segment
+        with ArchiveSegment(path) as archived:
+            assert list(archived.rows(rows[2][1], rows[4][1])) == rows[2:4]
+
+    def test_latest_rows_before_cursor(self, segment):
+        path, rows = segment
+        with ArchiveSegment(path) as archived:
+            latest = archived.latest_rows(JANUARY, FEBRUARY, before=(rows[4][1], rows[4][0]), limit=2)
+        assert latest == [rows[3], rows[2]]
+
+    def test_latest_rows_tie_break_on_id(self, tmp_path):
+        moment = JANUARY + timedelta(days=1)
+        rows = [(10, moment, 21.0, False), (11, moment, 22.0, True)]
+        path = segment_path(1, JANUARY, str(tmp_path))
+        write_segment(path, rows)
+
+        with ArchiveSegment(path) as archived:
+            assert archived.latest_rows(JANUARY, FEBRUARY) == [rows[1], rows[0]]
+            assert archived.latest_rows(JANUARY, FEBRUARY, before=(moment, 11)) == [rows[0]]
+
+    def test_aggregate(self, segment):
+        path, rows = segment
+        with ArchiveSegment(path) as archived:
+            stats = archived.aggregate()
+            assert archived.aggregate(FEBRUARY, FEBRUARY + timedelta(days=1)) is None
+        assert stats == {'min': 20.0, 'max': 21.25, 'sum': sum(row[2] for row in rows), 'count': 6, 'alerts': 2}
+
+    def test_verify_segment(self, segment):
+        path, rows = segment
+        verify_segment(path, rows)
+        with pytest.raises(ArchiveError):
+            verify_segment(path, rows[:-1])
+
+    def test_rejects_foreign_file(self, tmp_path):
+        path = tmp_path / "invalid.trd"
+        path.write_bytes(b"\0" * 16)
+        with pytest.raises(ValueError):
+            ArchiveSegment(str(path))
+
+
+class TestReadLatestHistory:
+    def test_continues_across_months_and_monitors(self, tmp_path):
+        directory = str(tmp_path)
+        january = month_rows(JANUARY, 1, 3)
+        february = month_rows(FEBRUARY, 100, 2)
+        write_segment(segment_path(1, JANUARY, directory), january)
+        write_segment(segment_path(2, FEBRUARY, directory), february)
+        end = FEBRUARY + timedelta(days=28)
+
+        first = read_latest_history(JANUARY, end, limit=3, directory=directory)
+        assert [(row[0], row[1]) for row in first] == [(2, 101), (2, 100), (1, 3)]
+
+        cursor = (first[-1][2], first[-1][1])
+        second = read_latest_history(JANUARY, end, before=cursor, limit=3, directory=directory)
+        assert [(row[0], row[1]) for row in second] == [(1, 2), (1, 1)]
+
+    def test_filters_monitors(self, tmp_path):
+        directory = str(tmp_path)
+        write_segment(segment_path(1, JANUARY, directory), month_rows(JANUARY, 1, 2))
+        write_segment(segment_path(2, JANUARY, directory), month_rows(JANUARY, 50, 2))
+
+        rows = read_latest_history(JANUARY, FEBRUARY, monitor_ids=[2], directory=directory)
+        assert {row[0] for row in rows} == {2}
+
+
+def create_reading(monitor, moment, temperature=20.0):
+    reading = TemperatureReading.objects.create(monitor_setting=monitor, temperature_celsius=temperature,
+                                                latitude=0, longitude=0)
+    TemperatureReading.objects.filter(pk=reading.pk).update(timestamp=moment)
+    return reading.pk
+
+
+@pytest.mark.django_db
+class TestArchiveReadings:
+    def test_archives_and_removes_month(self, tmp_path):
+        monitor = MonitorSettingFactory()
+        ids = [create_reading(monitor, JANUARY + timedelta(days=day)) for day in range(3)]
+
+        months = archive_readings(before=FEBRUARY + timedelta(days=1), directory=str(tmp_path))
+
+        assert months == [JANUARY]
+        assert not TemperatureReading.objects.filter(pk__in=ids).exists()
+        assert [row[1] for row in read_history(JANUARY, FEBRUARY, directory=str(tmp_path))] == ids
+
+    def test_reading_written_during_archiving_is_not_lost(self, tmp_path, monkeypatch):
+        monitor = MonitorSettingFactory()
+        create_reading(monitor, JANUARY + timedelta(days=1))
+        late = []
+        original = archive.write_segment
+
+        def write_segment_with_late_reading(path, rows):
+            # Leitura atrasada gravada no mês entre a leitura do segmento e a remoção.
+            if not late:
+                late.append(create_reading(monitor, JANUARY + timedelta(days=2)))
+            original(path, rows)
+
+        monkeypatch.setattr(archive, "write_segment", write_segment_with_late_reading)
+        archive_readings(before=FEBRUARY + timedelta(days=1), directory=str(tmp_path))
+
+        archived = {row[1] for row in read_history(JANUARY, FEBRUARY, directory=str(tmp_path))}
+        in_database = TemperatureReading.objects.filter(pk=late[0]).exists()
+        assert late[0] in archived or in_database
+        assert late[0] in archived
+        assert not in_database
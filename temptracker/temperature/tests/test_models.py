@@ -0,0 +1,109 @@
+import pytest
+from django.core.exceptions import ValidationError
+
+from temptracker.temperature import models
+from temptracker.temperature.models import MonitorSetting
+from temptracker.temperature.tests.factories import MonitorSettingFactory
+
+
+def build_monitor(**fields):
+    values = {"location_name": "Teste", "latitude": 0, "longitude": 0, "temperature_limit_celsius": 30,
+              "monitoring_interval_minutes": 15}
+    return MonitorSetting(**{**values, **fields})
+
+
+class TestCoordinates:
+    def test_out_of_range_coordinates_are_rejected(self):
+        with pytest.raises(ValidationError) as error:
+            build_monitor(latitude=91, longitude=-181).full_clean()
+        assert {"latitude", "longitude"} <= set(error.value.message_dict)
+
+    def test_limits_are_accepted(self):
+        build_monitor(latitude=-90, longitude=180).full_clean()
+
+
+class TestAdaptiveIntervalFor:
+    @pytest.fixture(autouse=True)
+    def _full_margin(self, settings):
+        settings.TEMPERATURE_ADAPTIVE_FULL_MARGIN_CELSIUS = 10.0
+
+    def _monitor(self, minimum=10):
+        return build_monitor(monitoring_interval_minutes=60, min_monitoring_interval_minutes=minimum,
+                             adaptive_interval=True)
+
+    def test_at_or_above_limit_uses_minimum(self):
+        monitor = self._monitor()
+        assert monitor.adaptive_interval_for(30) == 10
+        assert monitor.adaptive_interval_for(35) == 10
+
+    def test_grows_linearly_with_margin(self):
+        assert self._monitor().adaptive_interval_for(25) == 35
+
+    def test_full_margin_uses_maximum(self):
+        monitor = self._monitor()
+        assert monitor.adaptive_interval_for(20) == 60
+        assert monitor.adaptive_interval_for(-10) == 60
+
+    def test_without_minimum_uses_configured_interval(self):
+        assert self._monitor(minimum=None).adaptive_interval_for(30) == 60
+
+
+class TestIntervalValidation:
+    def test_minimum_above_maximum_is_rejected(self):
+        monitor = build_monitor(monitoring_interval_minutes=10, min_monitoring_interval_minutes=20)
+        with pytest.raises(ValidationError) as error:
+            monitor.full_clean()
+        assert "min_monitoring_interval_minutes" in error.value.message_dict
+
+    def test_intervals_must_be_positive(self):
+        with pytest.raises(ValidationError) as error:
+            build_monitor(monitoring_interval_minutes=0, min_monitoring_interval_minutes=0).full_clean()
+        assert {"monitoring_interval_minutes", "min_monitoring_interval_minutes"} <= set(error.value.message_dict)
+
+
+@pytest.mark.django_db
+class TestSaveScheduling:
+    """save() só mexe no scheduler quando is_active ou o intervalo mudam (estado carregado em from_db)."""
+
+    @pytest.fixture
+    def calls(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(models, "add_monitor_job", lambda monitor: calls.append(("add", monitor.pk)))
+        monkeypatch.setattr(models, "reschedule_monitor_job", lambda monitor: calls.append(("reschedule", monitor.pk)))
+        monkeypatch.setattr(models, "remove_monitor_job", lambda pk: calls.append(("remove", pk)))
+        return calls
+
+    def test_loaded_state_is_tracked(self):
+        monitor = MonitorSetting.objects.get(pk=MonitorSettingFactory(monitoring_interval_minutes=20).pk)
+        assert monitor._loaded_scheduling == (False, 20)
+
+    def test_unrelated_change_does_not_touch_scheduler(self, calls):
+        monitor = MonitorSetting.objects.get(pk=MonitorSettingFactory(is_active=True).pk)
+        calls.clear()
+
+        monitor.location_name = "Outra"
+        monitor.temperature_limit_celsius = 40
+        monitor.save()
+
+        assert calls == []
+
+    def test_interval_change_reschedules(self, calls):
+        monitor = MonitorSetting.objects.get(pk=MonitorSettingFactory(is_active=True).pk)
+        calls.clear()
+
+        monitor.monitoring_interval_minutes = 30
+        monitor.save()
+        monitor.save()
+
+        assert calls == [("reschedule", monitor.pk)]
+
+    def test_activation_and_deactivation(self, calls):
+        monitor = MonitorSetting.objects.get(pk=MonitorSettingFactory().pk)
+        assert calls == []
+
+        monitor.is_active = True
+        monitor.save()
+        monitor.is_active = False
+        monitor.save()
+
+        assert calls == [("add", monitor.pk), ("remove", monitor.pk)]
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache
+
+from temptracker.temperature import monitoring
+from temptracker.temperature.models import MonitorSetting, MonitorState
+from temptracker.temperature.monitoring import (PRIORITY_LAST_MINUTE_KEY, monitor_prioritized_temperatures,
+                                                prioritize_monitors, update_monitor_states)
+from temptracker.temperature.tests.factories import MonitorSettingFactory
+
+NOW = datetime(2026, 1, 1, 12, 30, tzinfo=timezone.utc)
+
+
+def reading(monitor, temperature, moment):
+    return SimpleNamespace(monitor_setting_id=monitor.pk, temperature_celsius=temperature, timestamp=moment)
+
+
+def alert(monitor, moment):
+    return SimpleNamespace(monitor_setting_id=monitor.pk, alert_timestamp=moment)
+
+
+class TestPrioritizeMonitors:
+    def _monitors(self, *margins):
+        return [SimpleNamespace(pk=index, margin=margin) for index, margin in enumerate(margins)]
+
+    def test_fills_capacity_in_order(self):
+        monitors = self._monitors(5, 6, 7, 8)
+        selected, shed = prioritize_monitors(monitors, capacity=2, at_risk_margin=2)
+        assert selected == monitors[:2]
+        assert shed == monitors[2:]
+
+    def test_at_risk_monitors_ignore_capacity(self):
+        monitors = self._monitors(None, 0, 1.5, 2, 9)
+        selected, shed = prioritize_monitors(monitors, capacity=1, at_risk_margin=2)
+        assert selected == monitors[:4]
+        assert shed == monitors[4:]
+
+    def test_zero_capacity_is_unlimited(self):
+        monitors = self._monitors(10, 20, 30)
+        assert prioritize_monitors(monitors, capacity=0, at_risk_margin=2) == (monitors, [])
+
+
+@pytest.mark.django_db
+class TestUpdateMonitorStates:
+    def test_creates_state_from_latest_reading(self):
+        monitor = MonitorSettingFactory()
+        update_monitor_states(
+            [reading(monitor, 20.0, NOW), reading(monitor, 31.0, NOW + timedelta(minutes=1))],
+            [alert(monitor, NOW + timedelta(minutes=1))],
+        )
+
+        state = MonitorState.objects.get(monitor_setting=monitor)
+        assert state.last_temperature_celsius == 31.0
+        assert state.last_reading_at == NOW + timedelta(minutes=1)
+        assert state.last_alert_at == NOW + timedelta(minutes=1)
+        assert state.unread_alert_count == 1
+
+    def test_older_reading_does_not_replace_state(self):
+        monitor = MonitorSettingFactory()
+        update_monitor_states([reading(monitor, 25.0, NOW)], [])
+        update_monitor_states([reading(monitor, 40.0, NOW - timedelta(hours=1))],
+                              [alert(monitor, NOW - timedelta(hours=1))])
+
+        state = MonitorState.objects.get(monitor_setting=monitor)
+        assert state.last_temperature_celsius == 25.0
+        assert state.last_reading_at == NOW
+        assert state.last_alert_at == NOW - timedelta(hours=1)
+        assert state.unread_alert_count == 1
+
+    def test_unread_alerts_accumulate(self):
+        monitor = MonitorSettingFactory()
+        update_monitor_states([reading(monitor, 31.0, NOW)], [alert(monitor, NOW)])
+        update_monitor_states([reading(monitor, 32.0, NOW + timedelta(minutes=5))],
+                              [alert(monitor, NOW + timedelta(minutes=5))])
+
+        state = MonitorState.objects.get(monitor_setting=monitor)
+        assert state.last_temperature_celsius == 32.0
+        assert state.unread_alert_count == 2
+
+
+@pytest.mark.django_db
+class TestMonitorPrioritizedTemperatures:
+    def test_shed_monitor_runs_on_next_tick(self, settings, monkeypatch):
+        settings.TEMPERATURE_PRIORITY_MAX_PER_TICK = 1
+        # bulk_create não passa por save(): nenhum job é agendado.
+        monitors = MonitorSetting.objects.bulk_create(
+            MonitorSettingFactory.build_batch(2, is_active=True, monitoring_interval_minutes=15)
+        )
+        # Longe do limite: nenhum dos dois está em risco.
+        update_monitor_states([reading(monitor, 0.0, NOW) for monitor in monitors], [])
+        processed = []
+        monkeypatch.setattr(monitoring, "monitor_temperatures",
+                            lambda selected: processed.append({monitor.pk for monitor in selected}))
+        minute = round(NOW.timestamp() / 60)
+        cache.clear()
+        # Ticks perdidos no último intervalo: os dois monitores estão pendentes.
+        cache.set(PRIORITY_LAST_MINUTE_KEY, minute - 15)
+
+        monkeypatch.setattr(monitoring.timezone, "now", lambda: NOW)
+        monitor_prioritized_temperatures()
+        monkeypatch.setattr(monitoring.timezone, "now", lambda: NOW + timedelta(minutes=1))
+        monitor_prioritized_temperatures()
+
+        first, second = processed
+        assert len(first) == 1
+        shed = {monitor.pk for monitor in monitors} - first
+        assert shed <= second
+        assert monitoring.get_scheduler_stats()['carried'] == 1
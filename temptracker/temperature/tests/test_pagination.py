@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from temptracker.temperature.api.pagination import KeysetPagination
+from temptracker.temperature.models import Alert
+from temptracker.temperature.tests.factories import MonitorSettingFactory
+
+NOW = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+KEYSET_FIELDS = ('alert_timestamp', 'id')
+
+
+def make_request(**params):
+    return Request(APIRequestFactory().get("/api/alerts/", params))
+
+
+class ArchiveView:
+    """View com itens arquivados, mais antigos que os do banco, como a de leituras."""
+    keyset_fields = KEYSET_FIELDS
+
+    def __init__(self, archived):
+        self.archived = archived
+        self.calls = []
+
+    def get_archived_items(self, before, limit):
+        self.calls.append((before, limit))
+        items = [item for item in self.archived
+                 if before is None or (item.alert_timestamp, item.id) < before]
+        return items[:limit]
+
+
+@pytest.fixture
+def alerts(db):
+    """Cinco alertas, três deles no mesmo instante."""
+    monitor = MonitorSettingFactory()
+    created = [Alert.objects.create(monitor_setting=monitor, alert_temperature_celsius=31) for _ in range(5)]
+    moments = [NOW, NOW, NOW, NOW - timedelta(minutes=1), NOW + timedelta(minutes=1)]
+    for alert, moment in zip(created, moments):
+        Alert.objects.filter(pk=alert.pk).update(alert_timestamp=moment)
+    return sorted(Alert.objects.all(), key=lambda alert: (alert.alert_timestamp, alert.id), reverse=True)
+
+
+def paginate(queryset, view, page_size, cursor=None):
+    paginator = KeysetPagination()
+    params = {"page_size": page_size}
+    if cursor:
+        params["cursor"] = cursor
+    page = paginator.paginate_queryset(queryset, make_request(**params), view)
+    return paginator, page
+
+
+class TestCursor:
+    def test_round_trip(self):
+        paginator = KeysetPagination()
+        paginator.fields = KEYSET_FIELDS
+        cursor = paginator.encode_cursor(SimpleNamespace(alert_timestamp=NOW, id=42))
+
+        assert paginator.decode_cursor(make_request(cursor=cursor)) == (NOW, 42)
+
+    def test_missing_cursor(self):
+        assert KeysetPagination().decode_cursor(make_request()) is None
+
+    @pytest.mark.parametrize("cursor", ["invalido", "WyJvbnRlbSIsIDFd"])
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(NotFound):
+            KeysetPagination().decode_cursor(make_request(cursor=cursor))
+
+    def test_page_size_is_capped(self, settings):
+        settings.TEMPERATURE_API_MAX_PAGE_SIZE = 10
+        assert KeysetPagination().get_page_size(make_request(page_size=500)) == 10
+        assert KeysetPagination().get_page_size(make_request(page_size=0)) == 1
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    view = SimpleNamespace(keyset_fields=KEYSET_FIELDS)
+
+    def test_pages_follow_timestamp_then_id(self, alerts):
+        seen, cursor = [], None
+        while True:
+            paginator, page = paginate(Alert.objects.all(), self.view, 2, cursor)
+            seen += page
+            if not paginator.has_next:
+                break
+            cursor = paginator.encode_cursor(page[-1])
+
+        assert [alert.pk for alert in seen] == [alert.pk for alert in alerts]
+
+    def test_next_link_only_when_more_items(self, alerts):
+        paginator, page = paginate(Alert.objects.all(), self.view, 5)
+        assert len(page) == 5
+        assert paginator.get_next_link() is None
+
+        paginator, page = paginate(Alert.objects.all(), self.view, 4)
+        assert "cursor=" in paginator.get_next_link()
+
+    def test_continues_into_archived_items(self, alerts):
+        archived = [SimpleNamespace(alert_timestamp=NOW - timedelta(days=days), id=1000 - days) for days in (1, 2, 3)]
+        view = ArchiveView(archived)
+
+        paginator, page = paginate(Alert.objects.all(), view, 4)
+        assert page == alerts[:4]
+        assert view.calls == []
+
+        paginator, page = paginate(Alert.objects.all(), view, 4, paginator.encode_cursor(page[-1]))
+        last = alerts[-1]
+        assert page == [last, *archived]
+        assert view.calls == [((last.alert_timestamp, last.id), 4)]
+        assert not paginator.has_next
+
+    def test_cursor_inside_archive(self, alerts):
+        archived = [SimpleNamespace(alert_timestamp=NOW - timedelta(days=days), id=1000 - days) for days in (1, 2, 3)]
+        view = ArchiveView(archived)
+        paginator = KeysetPagination()
+        paginator.fields = KEYSET_FIELDS
+
+        paginator, page = paginate(Alert.objects.all(), view, 2, paginator.encode_cursor(archived[0]))
+
+        assert page == archived[1:]
+        assert view.calls == [((archived[0].alert_timestamp, archived[0].id), 3)]
@@ -0,0 +1,120 @@
+import pytest
+
+from temptracker.temperature import resilience
+from temptracker.temperature.resilience import CircuitBreaker, CircuitOpenError, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(resilience, "time", clock)
+    return clock
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self, clock):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_success_resets_failures(self, clock):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_allows_a_single_probe(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        clock.now += 60
+
+        breaker.before_call()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.before_call()
+
+    def test_failed_probe_reopens(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        clock.now += 60
+        breaker.before_call()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_trip_opens_for_given_interval(self, clock):
+        breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+        breaker.trip(5)
+
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        clock.now += 5
+        breaker.before_call()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    def test_failure_after_trip_uses_reset_timeout(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.trip(5)
+        clock.now += 5
+        breaker.before_call()
+        breaker.record_failure()
+        clock.now += 5
+
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+
+class TestTokenBucket:
+    def test_local_bucket_is_used_without_redis(self, clock):
+        bucket = TokenBucket("test:bucket", rate=2, capacity=2)
+        assert bucket._script is None
+
+    def test_consumes_and_refills(self, clock):
+        bucket = TokenBucket("test:bucket", rate=2, capacity=2)
+
+        assert bucket.acquire()
+        assert bucket.acquire()
+        assert not bucket.acquire()
+
+        clock.now += 0.5
+        assert bucket.acquire()
+
+    def test_waits_within_timeout(self, clock):
+        bucket = TokenBucket("test:bucket", rate=2, capacity=1)
+        assert bucket.acquire()
+
+        started = clock.now
+        assert bucket.acquire(timeout=1)
+        assert clock.now - started == pytest.approx(0.5)
+        assert not bucket.acquire(timeout=0.1)
+
+    def test_capacity_limits_refill(self, clock):
+        bucket = TokenBucket("test:bucket", rate=10, capacity=2)
+        clock.now += 60
+
+        assert bucket.acquire(tokens=2)
+        assert not bucket.acquire()
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from temptracker.temperature.models import TemperatureRollup
+from temptracker.temperature.rollups import update_rollups
+from temptracker.temperature.tests.factories import MonitorSettingFactory
+
+NOW = datetime(2026, 1, 1, 12, 30, tzinfo=timezone.utc)
+
+
+def reading(monitor, temperature, moment, alert=False):
+    return SimpleNamespace(monitor_setting_id=monitor.pk, temperature_celsius=temperature, timestamp=moment,
+                           generated_notification=alert)
+
+
+@pytest.mark.django_db
+class TestUpdateRollups:
+    def _rollup(self, monitor, granularity, start):
+        return TemperatureRollup.objects.get(monitor_setting=monitor, granularity=granularity, bucket_start=start)
+
+    def test_batches_are_merged_into_existing_buckets(self):
+        monitor = MonitorSettingFactory()
+        update_rollups([reading(monitor, 20.0, NOW), reading(monitor, 24.0, NOW + timedelta(minutes=10))])
+        update_rollups([reading(monitor, 18.0, NOW + timedelta(minutes=20)),
+                        reading(monitor, 35.0, NOW + timedelta(minutes=25), alert=True)])
+
+        hour = self._rollup(monitor, TemperatureRollup.HOUR, NOW.replace(minute=0))
+        assert (hour.min_celsius, hour.max_celsius, hour.sum_celsius) == (18.0, 35.0, 97.0)
+        assert (hour.reading_count, hour.alert_count) == (4, 1)
+
+        day = self._rollup(monitor, TemperatureRollup.DAY, NOW.replace(hour=0, minute=0))
+        assert (day.reading_count, day.alert_count) == (4, 1)
+
+    def test_readings_are_split_by_bucket(self):
+        monitor = MonitorSettingFactory()
+        rows = update_rollups([reading(monitor, 20.0, NOW), reading(monitor, 22.0, NOW + timedelta(hours=1))])
+
+        # Duas horas e um dia
+        assert rows == 3
+        assert self._rollup(monitor, TemperatureRollup.HOUR, NOW.replace(minute=0)).reading_count == 1
+        assert self._rollup(monitor, TemperatureRollup.DAY, NOW.replace(hour=0, minute=0)).reading_count == 2
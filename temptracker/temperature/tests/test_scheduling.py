@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from temptracker.temperature.models import MonitorSetting
+from temptracker.temperature.monitoring import get_due_monitors
+from temptracker.temperature.scheduling import is_web_process, phase_offset, phased_trigger
+from temptracker.temperature.tests.factories import MonitorSettingFactory
+
+
+class TestPhaseOffset:
+    def test_is_deterministic_and_within_period(self):
+        for key in range(1, 200):
+            offset = phase_offset(key, 15)
+            assert 0 <= offset < 15
+            assert offset == phase_offset(key, 15)
+
+    def test_spreads_consecutive_keys(self):
+        offsets = [phase_offset(key, 60) for key in range(1, 61)]
+        assert len(set(offsets)) > 40
+
+    def test_phased_trigger_is_aligned_to_phase(self):
+        trigger = phased_trigger(7, 15)
+        assert trigger.start_date.timestamp() % 900 == phase_offset(7, 900)
+
+
+class TestIsWebProcess:
+    @pytest.mark.parametrize(("argv", "run_main", "expected"), [
+        (["/venv/bin/gunicorn", "config.wsgi"], None, True),
+        (["manage.py", "migrate"], None, False),
+        (["manage.py", "shell"], None, False),
+        (["manage.py", "runserver"], None, False),
+        (["manage.py", "runserver"], "true", True),
+        (["manage.py", "runserver", "--noreload"], None, True),
+    ])
+    def test_only_servers_are_web_processes(self, monkeypatch, argv, run_main, expected):
+        monkeypatch.setattr("sys.argv", argv)
+        if run_main is None:
+            monkeypatch.delenv("RUN_MAIN", raising=False)
+        else:
+            monkeypatch.setenv("RUN_MAIN", run_main)
+        assert is_web_process() is expected
+
+
+@pytest.mark.django_db
+class TestGetDueMonitors:
+    def _create(self, count, interval):
+        # bulk_create não passa por save(): nenhum job é agendado.
+        return MonitorSetting.objects.bulk_create(
+            MonitorSettingFactory.build_batch(count, is_active=True, monitoring_interval_minutes=interval)
+        )
+
+    def test_each_monitor_is_due_once_per_interval(self):
+        monitors = self._create(20, 5)
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+        due = {}
+        for minute in range(5):
+            for monitor in get_due_monitors(start + timedelta(minutes=minute)):
+                due.setdefault(monitor.pk, []).append(minute)
+
+        assert due == {monitor.pk: [phase_offset(monitor.pk, 5)] for monitor in monitors}
+
+    def test_interval_of_one_minute_is_always_due(self):
+        monitors = self._create(3, 1)
+        due = get_due_monitors(datetime(2026, 1, 1, 0, 7, tzinfo=timezone.utc))
+        assert {monitor.pk for monitor in due} == {monitor.pk for monitor in monitors}
+
+    def test_inactive_monitors_are_ignored(self):
+        MonitorSetting.objects.bulk_create(MonitorSettingFactory.build_batch(3, monitoring_interval_minutes=1))
+        assert get_due_monitors(datetime(2026, 1, 1, tzinfo=timezone.utc)) == []
+
+    def test_uses_adaptive_interval(self):
+        monitor, = self._create(1, 60)
+        MonitorSetting.objects.filter(pk=monitor.pk).update(adaptive_interval=True, current_interval_minutes=1)
+        due = get_due_monitors(datetime(2026, 1, 1, 0, 13, tzinfo=timezone.utc))
+        assert [due_monitor.pk for due_monitor in due] == [monitor.pk]
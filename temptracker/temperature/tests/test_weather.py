@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+
+from temptracker.temperature import weather
+from temptracker.temperature.providers import WeatherProvider
+from temptracker.temperature.weather import InvalidLocationError, interpolate_series
+
+
+class FakeProvider(WeatherProvider):
+    """Responde com a latitude como temperatura e rejeita (400) blocos com coordenadas inválidas."""
+
+    def __init__(self, invalid):
+        self.invalid = set(invalid)
+        self.calls = []
+
+    def request(self, client, kind, latitudes, longitudes):
+        self.calls.append(len(latitudes))
+        if self.invalid.intersection(zip(latitudes, longitudes)):
+            raise InvalidLocationError("Erro HTTP na API de clima: 400")
+        return [{"current": {"temperature_2m": latitude}} for latitude in latitudes]
+
+
+@pytest.fixture
+def weather_cache():
+    cache = caches[settings.WEATHER_CACHE_ALIAS]
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+class TestInterpolateSeries:
+    series = {"time": [0, 900, 1800], "temperature": [10.0, 20.0, 14.0]}
+
+    def test_exact_point(self):
+        assert interpolate_series(self.series, 900) == 20.0
+
+    def test_between_points(self):
+        assert interpolate_series(self.series, 450) == 15.0
+        assert interpolate_series(self.series, 1350) == 17.0
+
+    def test_outside_series(self):
+        assert interpolate_series(self.series, -1) is None
+        assert interpolate_series(self.series, 1801) is None
+        assert interpolate_series({"time": [], "temperature": []}, 0) is None
+
+
+class TestFetchCells:
+    def test_invalid_cell_is_isolated(self, monkeypatch, weather_cache):
+        cells = [(float(index), 0.0) for index in range(8)]
+        provider = FakeProvider(invalid=[cells[5]])
+        monkeypatch.setattr(weather, "get_weather_provider", lambda: provider)
+        monkeypatch.setattr(weather, "get_weather_client", lambda: None)
+
+        fetched = dict(weather._fetch_cells(cells, "current", "sync"))
+
+        assert fetched[cells[5]] is None
+        assert all(fetched[cell] == cell[0] for cell in cells if cell != cells[5])
+        # Bloco de 8 rejeitado, metades de 4, 2 e 1 até isolar a célula.
+        assert provider.calls == [8, 4, 4, 2, 1, 1, 2]
+        assert weather_cache.get(weather._negative_cache_key(cells[5])) is True
+        assert weather_cache.get(weather._negative_cache_key(cells[4])) is None
+
+    def test_negative_cached_cell_is_skipped(self, monkeypatch, weather_cache):
+        cells = [(1.0, 1.0), (2.0, 2.0)]
+        provider = FakeProvider(invalid=[])
+        monkeypatch.setattr(weather, "get_weather_provider", lambda: provider)
+        monkeypatch.setattr(weather, "get_weather_client", lambda: None)
+        weather._mark_failed([cells[0]])
+
+        fetched = dict(weather._fetch_cells(cells, "current", "sync"))
+
+        assert fetched == {cells[0]: None, cells[1]: 2.0}
+        assert provider.calls == [1]
+
+
+class TestRetryAfter:
+    def test_seconds(self):
+        assert weather._retry_after(SimpleNamespace(headers={"Retry-After": "30"})) == 30.0
+
+    def test_missing_or_invalid(self):
+        assert weather._retry_after(SimpleNamespace(headers={})) is None
+        assert weather._retry_after(SimpleNamespace(headers={"Retry-After": "amanhã"})) is None
@@ -1,14 +1,20 @@
 from django.urls import path
 from . import views
 from temptracker.temperature.api.views import (MonitorSettingListCreateAPIView,
+                                               MonitorStateListAPIView,
                                                TemperatureReadingListAPIView,
                                                AlertListCreateAPIView,
-                                               AlertConfirmView,)
+                                               AlertConfirmView,
+                                               UnreadAlertCountView,
+                                               SchedulerStatsView,)
 
 urlpatterns = [
     path('', views.monitor_status, name='monitor_status'),
     path('api/v1/monitor-settings/', MonitorSettingListCreateAPIView.as_view(), name='monitor_settings'),
+    path('api/v1/monitor-states/', MonitorStateListAPIView.as_view(), name='monitor_states'),
     path('api/v1/temperature-readings/', TemperatureReadingListAPIView.as_view(), name='temperature_readings'),
     path('api/v1/alerts/', AlertListCreateAPIView.as_view(), name='alerts'),
+    path('api/v1/alerts/unread-count/', UnreadAlertCountView.as_view(), name='alerts_unread_count'),
     path('api/v1/alerts/confirm/<int:pk>/', AlertConfirmView.as_view(), name="api_alert_confirm"),
+    path('api/v1/scheduler-stats/', SchedulerStatsView.as_view(), name='scheduler_stats'),
 ]
@@ -0,0 +1,573 @@
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .resilience import CircuitBreaker, CircuitOpenError, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_provider = None
+_breaker = None
+_rate_limiter = None
+_client_lock = threading.Lock()
+
+# Respostas que indicam sobrecarga ou indisponibilidade da API, e que
+# portanto contam como falha para o disjuntor.
+UPSTREAM_FAILURE_STATUSES = frozenset([429, 500, 502, 503, 504])
+# Respostas repetidas pela sessão HTTP. O 429 fica de fora: repeti-lo só
+# prolonga a sobrecarga; ele abre o disjuntor pelo prazo do Retry-After.
+RETRY_STATUSES = frozenset([500, 502, 503, 504])
+TOO_MANY_REQUESTS = 429
+
+
+class WeatherAPIError(Exception):
+    """Erro ao obter ou interpretar dados da API de clima."""
+
+
+class InvalidLocationError(WeatherAPIError):
+    """A API rejeitou a requisição (HTTP 400), em geral por coordenada inválida."""
+
+
+def interpolate_series(series, moment):
+    """
+    Interpola linearmente a temperatura da série no instante ``moment``
+    (segundos Unix). Retorna ``None`` se o instante estiver fora da série.
+    """
+    times = series['time']
+    temperatures = series['temperature']
+    if not times or moment < times[0] or moment > times[-1]:
+        return None
+
+    index = bisect.bisect_left(times, moment)
+    if times[index] == moment:
+        return round(temperatures[index], 2)
+
+    t0, t1 = times[index - 1], times[index]
+    v0, v1 = temperatures[index - 1], temperatures[index]
+    return round(v0 + (v1 - v0) * (moment - t0) / (t1 - t0), 2)
+
+
+def _as_location_list(data, expected):
+    """Normaliza a resposta da API para uma lista com um objeto por localidade."""
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list) or len(data) != expected:
+        raise WeatherAPIError("Erro ao processar dados da API: quantidade de localidades divergente")
+    return data
+
+
+class WeatherClient:
+    """
+    Cliente HTTP da API de clima com um pool de conexões keep-alive.
+
+    Uma única instância é compartilhada por todas as threads do processo
+    (veja ``get_weather_client``), reaproveitando conexões TCP/TLS entre as
+    execuções dos jobs. O pool é limitado a ``WEATHER_HTTP_POOL_SIZE``
+    conexões: quando todas estão em uso, as threads aguardam uma conexão
+    livre em vez de abrir novas.
+    """
+
+    def __init__(self, pool_size=None, retries=None, backoff_factor=None, timeout=None):
+        self.timeout = timeout if timeout is not None else settings.REQUESTS_TIMEOUT
+        retry = Retry(
+            total=retries if retries is not None else settings.WEATHER_HTTP_RETRIES,
+            backoff_factor=backoff_factor if backoff_factor is not None else settings.WEATHER_HTTP_BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET']),
+            # Um Retry-After longo bloquearia a thread do job; o backoff fica
+            # limitado ao backoff_factor e a espera longa, a cargo do disjuntor.
+            respect_retry_after_header=False,
+        )
+        pool_size = pool_size or settings.WEATHER_HTTP_POOL_SIZE
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+            pool_block=True,
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def close(self):
+        self.session.close()
+
+    def request(self, url, params, expected):
+        """
+        Faz uma única requisição à API de clima e retorna a lista de objetos
+        da resposta, um por coordenada.
+
+        A requisição passa antes pelo limitador de taxa global e pelo
+        disjuntor; com o circuito aberto ela é recusada sem chamar a API.
+        """
+        if not get_rate_limiter().acquire(timeout=settings.WEATHER_RATE_LIMIT_MAX_WAIT):
+            raise WeatherAPIError("Limite de requisições à API de clima atingido")
+        breaker = _admit_call()
+
+        try:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            response.raise_for_status()  # Levanta exceção para códigos de erro HTTP
+            data = response.json()
+
+        except requests.exceptions.Timeout:
+            breaker.record_failure()
+            raise WeatherAPIError("Timeout na requisição à API de clima")
+
+        except requests.exceptions.ConnectionError:
+            breaker.record_failure()
+            raise WeatherAPIError("Erro de conexão com a API de clima")
+
+        except requests.exceptions.HTTPError as e:
+            _record_http_error(breaker, e.response)
+            raise _http_error(e.response.status_code, e)
+
+        except requests.exceptions.RequestException as e:
+            breaker.record_failure()
+            raise WeatherAPIError(f"Erro na requisição à API de clima: {e}")
+
+        except ValueError as e:
+            breaker.record_failure()
+            raise WeatherAPIError(f"Erro ao processar dados da API: {e}")
+
+        breaker.record_success()
+        return _as_location_list(data, expected)
+
+
+class AsyncWeatherClient:
+    """
+    Cliente assíncrono da API de clima, usado pelo motor de busca concorrente.
+
+    Todas as requisições de um tick compartilham um ``httpx.AsyncClient`` e
+    um semáforo que limita quantas ficam em andamento ao mesmo tempo
+    (``WEATHER_ASYNC_CONCURRENCY``), permitindo milhares de buscas a partir
+    de uma única thread.
+    """
+
+    def __init__(self, concurrency=None, retries=None, timeout=None):
+        self.concurrency = concurrency or settings.WEATHER_ASYNC_CONCURRENCY
+        self.timeout = timeout if timeout is not None else settings.REQUESTS_TIMEOUT
+        self.retries = retries if retries is not None else settings.WEATHER_HTTP_RETRIES
+        self._semaphore = None
+        self._client = None
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.concurrency,
+                                max_keepalive_connections=self.concurrency),
+            transport=httpx.AsyncHTTPTransport(retries=self.retries),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._client.aclose()
+
+    async def request(self, url, params, expected):
+        """Versão assíncrona de ``WeatherClient.request``."""
+        async with self._semaphore:
+            if not await get_rate_limiter().acquire_async(timeout=settings.WEATHER_RATE_LIMIT_MAX_WAIT):
+                raise WeatherAPIError("Limite de requisições à API de clima atingido")
+            breaker = _admit_call()
+
+            try:
+                response = await self._client.get(url, params=params)
+                response.raise_for_status()
+                data = response.json()
+
+            except httpx.TimeoutException:
+                breaker.record_failure()
+                raise WeatherAPIError("Timeout na requisição à API de clima")
+
+            except httpx.ConnectError:
+                breaker.record_failure()
+                raise WeatherAPIError("Erro de conexão com a API de clima")
+
+            except httpx.HTTPStatusError as e:
+                _record_http_error(breaker, e.response)
+                raise _http_error(e.response.status_code, e)
+
+            except httpx.HTTPError as e:
+                breaker.record_failure()
+                raise WeatherAPIError(f"Erro na requisição à API de clima: {e}")
+
+            except ValueError as e:
+                breaker.record_failure()
+                raise WeatherAPIError(f"Erro ao processar dados da API: {e}")
+
+        breaker.record_success()
+        return _as_location_list(data, expected)
+
+
+def get_weather_client():
+    """
+    Retorna o cliente de clima compartilhado pelo processo, criando-o na
+    primeira chamada.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = WeatherClient()
+    return _client
+
+
+def get_weather_provider():
+    """
+    Retorna o provedor de clima configurado em ``WEATHER_PROVIDER``,
+    instanciado uma única vez por processo.
+    """
+    global _provider
+    if _provider is None:
+        with _client_lock:
+            if _provider is None:
+                _provider = import_string(settings.WEATHER_PROVIDER)()
+    return _provider
+
+
+def get_circuit_breaker():
+    """Disjuntor da API de clima, compartilhado por todas as threads do processo."""
+    global _breaker
+    if _breaker is None:
+        with _client_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    failure_threshold=settings.WEATHER_CIRCUIT_FAILURE_THRESHOLD,
+                    reset_timeout=settings.WEATHER_CIRCUIT_RESET_SECONDS,
+                )
+    return _breaker
+
+
+def get_rate_limiter():
+    """Limitador de taxa global da API de clima, compartilhado via Redis."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _client_lock:
+            if _rate_limiter is None:
+                _rate_limiter = TokenBucket(
+                    key="weather:rate-limit",
+                    rate=settings.WEATHER_RATE_LIMIT_PER_SECOND,
+                    capacity=settings.WEATHER_RATE_LIMIT_BURST,
+                    cache_alias=settings.WEATHER_CACHE_ALIAS,
+                )
+    return _rate_limiter
+
+
+def _admit_call():
+    breaker = get_circuit_breaker()
+    try:
+        breaker.before_call()
+    except CircuitOpenError as e:
+        raise WeatherAPIError(str(e))
+    return breaker
+
+
+def _retry_after(response):
+    """
+    Segundos indicados no cabeçalho ``Retry-After`` (em segundos ou como
+    data HTTP), ou ``None`` se ausente ou inválido.
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _record_http_error(breaker, response):
+    status_code = response.status_code
+    if status_code == TOO_MANY_REQUESTS:
+        # A API pediu para reduzir o ritmo: o circuito abre já na primeira
+        # resposta 429, pelo prazo que ela indicou.
+        breaker.trip(_retry_after(response))
+    elif status_code in UPSTREAM_FAILURE_STATUSES:
+        breaker.record_failure()
+    else:
+        # A API respondeu; o erro é da requisição, não de indisponibilidade.
+        breaker.record_success()
+
+
+def _http_error(status_code, error):
+    if status_code == 400:
+        return InvalidLocationError(f"Erro HTTP na API de clima: {error}")
+    return WeatherAPIError(f"Erro HTTP na API de clima: {error}")
+
+
+def grid_cell(latitude, longitude):
+    """
+    Quantiza uma coordenada para o centro da célula de grade de resolução
+    ``WEATHER_GRID_RESOLUTION`` graus. Monitores na mesma célula
+    compartilham a mesma resposta da API.
+    """
+    resolution = settings.WEATHER_GRID_RESOLUTION
+    if not resolution:
+        return latitude, longitude
+    return (round(round(latitude / resolution) * resolution, 6),
+            round(round(longitude / resolution) * resolution, 6))
+
+
+def _grid_cache_key(kind, cell):
+    return f"weather:{kind}:{settings.WEATHER_GRID_RESOLUTION}:{cell[0]}:{cell[1]}"
+
+
+def _grid_cache_timeout():
+    """
+    Segundos até a próxima atualização da Open-Meteo, para que um valor em
+    cache nunca sobreviva à publicação de um dado mais novo.
+    """
+    interval = settings.WEATHER_UPDATE_INTERVAL_SECONDS
+    return max(1, int(interval - time.time() % interval))
+
+
+def _grid_cache():
+    return caches[settings.WEATHER_CACHE_ALIAS]
+
+
+def _chunks(cells):
+    batch_size = max(1, settings.OPEN_METEO_BATCH_SIZE)
+    for start in range(0, len(cells), batch_size):
+        yield start, cells[start:start + batch_size]
+
+
+def _negative_cache_key(cell):
+    return _grid_cache_key("failed", cell)
+
+
+def _store_chunk_results(values, failed, start, chunk, results, kind, raise_errors=False):
+    provider = get_weather_provider()
+    for offset, data in enumerate(results):
+        try:
+            values[start + offset] = provider.parse(kind, data)
+        except (KeyError, ValueError, TypeError) as e:
+            failed.append(chunk[offset])
+            if raise_errors:
+                raise WeatherAPIError(f"Erro ao processar dados da API: {e}")
+            lat, lon = chunk[offset]
+            logger.error(f"Erro ao processar dados da API para ({lat}, {lon}): {e}")
+
+
+def _split_invalid_chunk(chunk, error):
+    """
+    Um erro 400 em um bloco com várias localidades não diz qual coordenada
+    é inválida: o bloco é dividido ao meio e cada metade consultada de novo,
+    até isolar a(s) célula(s) com problema, sem perder as demais.
+    Retorna as metades, ou ``None`` se o bloco não deve ser dividido.
+    """
+    if isinstance(error, InvalidLocationError) and len(chunk) > 1:
+        middle = len(chunk) // 2
+        return (0, chunk[:middle]), (middle, chunk[middle:])
+    return None
+
+
+async def _fetch_chunk_async(client, provider, kind, values, failed, start, chunk):
+    try:
+        results = await provider.arequest(client, kind, [lat for lat, _ in chunk], [lon for _, lon in chunk])
+    except WeatherAPIError as e:
+        halves = _split_invalid_chunk(chunk, e)
+        if halves:
+            await asyncio.gather(*(_fetch_chunk_async(client, provider, kind, values, failed, start + offset, half)
+                                   for offset, half in halves))
+            return
+        if isinstance(e, InvalidLocationError):
+            failed.extend(chunk)
+        logger.error(f"Falha na requisição em lote ({len(chunk)} localidades): {e}")
+        return
+    _store_chunk_results(values, failed, start, chunk, results, kind)
+
+
+async def _fetch_cells_async(cells, kind):
+    values = [None] * len(cells)
+    failed = []
+    provider = get_weather_provider()
+
+    async with AsyncWeatherClient() as client:
+        await asyncio.gather(
+            *(_fetch_chunk_async(client, provider, kind, values, failed, start, chunk)
+              for start, chunk in _chunks(cells))
+        )
+    return values, failed
+
+
+def _fetch_chunk_sync(client, provider, kind, values, failed, start, chunk, raise_errors=False):
+    try:
+        results = provider.request(client, kind, [lat for lat, _ in chunk], [lon for _, lon in chunk])
+    except WeatherAPIError as e:
+        halves = _split_invalid_chunk(chunk, e)
+        if halves:
+            for offset, half in halves:
+                _fetch_chunk_sync(client, provider, kind, values, failed, start + offset, half, raise_errors)
+            return
+        if isinstance(e, InvalidLocationError):
+            failed.extend(chunk)
+        if raise_errors:
+            raise
+        logger.error(f"Falha na requisição em lote ({len(chunk)} localidades): {e}")
+        return
+    _store_chunk_results(values, failed, start, chunk, results, kind, raise_errors)
+
+
+def _fetch_cells_sync(cells, kind, raise_errors=False):
+    values = [None] * len(cells)
+    failed = []
+    client = get_weather_client()
+    provider = get_weather_provider()
+
+    for start, chunk in _chunks(cells):
+        try:
+            _fetch_chunk_sync(client, provider, kind, values, failed, start, chunk, raise_errors)
+        except WeatherAPIError:
+            _mark_failed(failed)
+            raise
+    return values, failed
+
+
+def _mark_failed(cells):
+    """
+    Guarda em cache negativo as células cuja consulta falhou por causa da
+    própria coordenada, para que não sejam consultadas de novo a cada tick.
+    """
+    if cells:
+        _grid_cache().set_many({_negative_cache_key(cell): True for cell in cells},
+                               timeout=settings.WEATHER_NEGATIVE_CACHE_SECONDS)
+        logger.warning(f"{len(cells)} células marcadas como falhas por {settings.WEATHER_NEGATIVE_CACHE_SECONDS}s")
+
+
+def _fetch_cells(cells, kind, engine, raise_errors=False):
+    """
+    Busca ``cells`` em blocos de até ``OPEN_METEO_BATCH_SIZE`` localidades,
+    cada bloco resultando em uma única requisição HTTP. Com o motor
+    ``"async"`` os blocos são buscados concorrentemente em um event loop;
+    com ``"sync"``, em sequência pelo cliente compartilhado.
+    Células em cache negativo são ignoradas.
+    """
+    negative = _grid_cache().get_many([_negative_cache_key(cell) for cell in cells])
+    if negative:
+        if raise_errors:
+            raise WeatherAPIError("Coordenada com falha recente na API de clima, consulta suspensa")
+        skipped = set(cells)
+        cells = [cell for cell in cells if _negative_cache_key(cell) not in negative]
+        skipped.difference_update(cells)
+    else:
+        skipped = set()
+
+    if engine == "async":
+        values, failed = asyncio.run(_fetch_cells_async(cells, kind))
+    else:
+        values, failed = _fetch_cells_sync(cells, kind, raise_errors)
+    _mark_failed(failed)
+    return list(zip(cells, values)) + [(cell, None) for cell in skipped]
+
+
+def _current_by_cell(cells, engine, raise_errors=False):
+    """
+    Temperatura atual por célula, consultando a API apenas para as células
+    ausentes do cache.
+    """
+    keys = {cell: _grid_cache_key("current", cell) for cell in cells}
+    cached = _grid_cache().get_many(list(keys.values()))
+    by_cell = {cell: cached[key] for cell, key in keys.items() if key in cached}
+    missing = [cell for cell in keys if cell not in by_cell]
+
+    if missing:
+        fetched = _fetch_cells(missing, "current", engine, raise_errors)
+        fresh = {cell: temperature for cell, temperature in fetched if temperature is not None}
+        _grid_cache().set_many({keys[cell]: temperature for cell, temperature in fresh.items()},
+                               timeout=_grid_cache_timeout())
+        by_cell.update(fresh)
+    return by_cell, len(missing)
+
+
+def _forecast_by_cell(cells, engine, raise_errors=False):
+    """
+    Temperatura por célula interpolada da série de previsão em cache.
+
+    A série de cada célula é buscada uma vez e mantida no cache por
+    ``WEATHER_FORECAST_REFRESH_SECONDS``; os ticks seguintes apenas a
+    interpolam no instante atual, sem requisição HTTP. Uma nova série só é
+    buscada quando expira ou não cobre mais o instante atual.
+    """
+    now = time.time()
+    keys = {cell: _grid_cache_key("series", cell) for cell in cells}
+    cached = _grid_cache().get_many(list(keys.values()))
+    by_cell = {}
+    missing = []
+
+    for cell, key in keys.items():
+        series = cached.get(key)
+        temperature = interpolate_series(series, now) if series else None
+        if temperature is None:
+            missing.append(cell)
+        else:
+            by_cell[cell] = temperature
+
+    if missing:
+        fetched = _fetch_cells(missing, "series", engine, raise_errors)
+        fresh = {cell: series for cell, series in fetched if series is not None}
+        _grid_cache().set_many({keys[cell]: series for cell, series in fresh.items()},
+                               timeout=settings.WEATHER_FORECAST_REFRESH_SECONDS)
+        for cell, series in fresh.items():
+            temperature = interpolate_series(series, now)
+            if temperature is not None:
+                by_cell[cell] = temperature
+    return by_cell, len(missing)
+
+
+def _temperatures_by_cell(cells, engine, raise_errors=False):
+    if settings.WEATHER_FETCH_MODE == "forecast":
+        return _forecast_by_cell(cells, engine, raise_errors)
+    return _current_by_cell(cells, engine, raise_errors)
+
+
+def fetch_current_temperature(latitude, longitude):
+    """
+    Obtém a temperatura atual de uma coordenada pelo provedor de clima,
+    reaproveitando a resposta em cache da célula de grade, se houver.
+    """
+    cell = grid_cell(latitude, longitude)
+    by_cell, _ = _temperatures_by_cell([cell], engine="sync", raise_errors=True)
+    if cell not in by_cell:
+        raise WeatherAPIError("Temperatura indisponível para o instante atual na resposta da API")
+    return by_cell[cell]
+
+
+def fetch_current_temperatures(coordinates, engine=None):
+    """
+    Obtém a temperatura atual de várias coordenadas em requisições agrupadas.
+
+    As coordenadas são primeiro reduzidas às suas células de grade; células
+    com resposta no cache compartilhado não geram requisição. As demais são
+    buscadas em blocos pelo motor configurado em ``WEATHER_FETCH_ENGINE``.
+    Retorna uma lista alinhada com ``coordinates``; posições cujo bloco ou
+    dado falhou recebem ``None``.
+    """
+    coordinates = list(coordinates)
+    engine = engine or settings.WEATHER_FETCH_ENGINE
+
+    cells = [grid_cell(lat, lon) for lat, lon in coordinates]
+    by_cell, requested = _temperatures_by_cell(list(dict.fromkeys(cells)), engine)
+
+    temperatures = [by_cell.get(cell) for cell in cells]
+    logger.info(
+        f"Temperaturas obtidas em lote ({engine}, {settings.WEATHER_FETCH_MODE}): "
+        f"{sum(t is not None for t in temperatures)}/{len(coordinates)} localidades, "
+        f"{requested} células buscadas na API"
+    )
+    return temperatures